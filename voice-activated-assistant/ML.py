@@ -1,49 +1,103 @@
-import spacy
-from transformers import pipeline, AutoModelForSequenceClassification, AutoTokenizer, AutoModelForSeq2SeqLM
-from transformers import EncoderDecoderModel, BertTokenizer
-from functools import lru_cache
 import logging
+import os
+from inference_cache import get_default_cache
+from model_registry import get_registry
+from profiles import get_profile, apply_thread_settings
+from routing import SummaryRouter
+from tracing import traced
+
+class LoggerAdapter:
+    """``CustomLogger``'s ``log_info``/``log_error`` interface on top of a ``logging.Logger``."""
 
-class MLModel:
     def __init__(self, logger):
         self.logger = logger
-        self.nlp = self.load_spacy_model("en_core_web_trf")
-        self.init_transformers_models()
+
+    def log_info(self, message):
+        self.logger.info(message)
+
+    def log_error(self, message):
+        self.logger.error(message)
+
+class MLModel:
+    """Sentiment, summarization and entity processing on top of the shared model registry.
+
+    Models are resolved lazily through ``model_registry``, so any number of
+    ``MLModel`` instances share one copy of each pipeline and nothing is loaded
+    until the first call that needs it. Which models are used comes from the
+    performance ``profile`` (see ``profiles.py``), by default the one named by
+    ``ASSISTANT_PROFILE``. ``logger`` is a ``CustomLogger`` or a plain
+    ``logging.Logger``.
+    """
+
+    def __init__(self, logger, registry=None, batch_size=8, cache=None, profile=None):
+        self.logger = logger if hasattr(logger, 'log_error') else LoggerAdapter(logger)
+        self.registry = registry or get_registry()
+        self.batch_size = batch_size
+        self.cache = cache or get_default_cache()
+        self.profile = get_profile(profile)
+        suffix = ':int8' if self.profile.quantize else ''
+        # Cache keys name the exact model variant, so profiles never share results
+        self.sentiment_key = self.profile.sentiment_model + suffix
+        self.summarization_key = self.profile.summarization_model + suffix
+        self.router = SummaryRouter(self)
+
+    @property
+    def nlp(self):
+        return self.load_spacy_model(self.profile.spacy_model)
+
+    @property
+    def sentiment_analyzer(self):
+        apply_thread_settings(self.profile)
+        return self.registry.pipeline('sentiment-analysis', self.profile.sentiment_model, quantize=self.profile.quantize)
+
+    @property
+    def summarizer(self):
+        apply_thread_settings(self.profile)
+        return self.registry.pipeline('summarization', self.profile.summarization_model, quantize=self.profile.quantize)
 
     def load_spacy_model(self, model_name):
         try:
-            nlp = spacy.load(model_name)
-            self.logger.log_info(f"Loaded spaCy model {model_name}")
-            return nlp
+            return self.registry.spacy(model_name)
         except Exception as e:
             self.logger.log_error(f"Failed to load spaCy model {model_name}: {e}")
             raise
 
     def init_transformers_models(self):
-        model_name_sentiment = "distilbert-base-uncased-finetuned-sst-2-english"
-        tokenizer_sentiment = AutoTokenizer.from_pretrained(model_name_sentiment)
-        model_sentiment = AutoModelForSequenceClassification.from_pretrained(model_name_sentiment)
-        self.sentiment_analyzer = pipeline('sentiment-analysis', model=model_sentiment, tokenizer=tokenizer_sentiment)
-
-        model_name_summarization = "facebook/bart-large-cnn"
-        tokenizer_summarization = AutoTokenizer.from_pretrained(model_name_summarization)
-        model_summarization = AutoModelForSeq2SeqLM.from_pretrained(model_name_summarization)
-        self.summarizer = pipeline('summarization', model=model_summarization, tokenizer=tokenizer_summarization)
+        """Eagerly load the transformers pipelines, e.g. to warm up before the first request."""
+        return self.sentiment_analyzer, self.summarizer
 
     def process_text(self, text):
-        doc = self.nlp(text)
-        entities = [(ent.text, ent.label_) for ent in doc.ents]
-        sentences = [sent.text for sent in doc.sents]
+        """Process a single text or an already parsed spaCy ``Doc``."""
+        if isinstance(text, str):
+            return self.process_texts([text])[0]
+        return self.process_docs([text])[0]
 
-        entity_based_processing = {ent[1]: [] for ent in entities}
-        for sentence in sentences:
-            sentiment_result = self.analyze_sentiment(sentence)
-            summary = self.summarize_text(sentence)
-            for ent in entities:
-                if ent[0] in sentence:
-                    entity_based_processing[ent[1]].append((sentence, sentiment_result, summary))
+    def process_texts(self, texts):
+        """Process several documents, running all of their sentences through the pipelines in batches."""
+        return self.process_docs(self.nlp.pipe(texts))
 
-        return self.process_entities(entity_based_processing)
+    @traced('ml.process_docs')
+    def process_docs(self, docs):
+        """Like ``process_texts`` for documents that have already been parsed."""
+        docs = list(docs)
+        spans = [list(doc.sents) for doc in docs]
+        sentences = [[sent.text for sent in doc_spans] for doc_spans in spans]
+        flat_sentences = [sentence for doc_sentences in sentences for sentence in doc_sentences]
+        sentiments = self.analyze_sentiment_batch(flat_sentences)
+        summaries = self.router.summarize_many(flat_sentences, sentences=True)
+
+        results = []
+        offset = 0
+        for doc, doc_sentences in zip(docs, sentences):
+            entities = [(ent.text, ent.label_) for ent in doc.ents]
+            entity_based_processing = {ent[1]: [] for ent in entities}
+            for i, sentence in enumerate(doc_sentences, start=offset):
+                for ent in entities:
+                    if ent[0] in sentence:
+                        entity_based_processing[ent[1]].append((sentence, sentiments[i], summaries[i]))
+            offset += len(doc_sentences)
+            results.append(self.process_entities(entity_based_processing))
+        return results
 
     def process_entities(self, data):
         results = []
@@ -62,33 +116,91 @@ class MLModel:
     def refine_summary(self, text, focus):
         if focus == 'negative':
             # Adjust summarization parameters for a more focused response on negative aspects
-            try:
-                result = self.summarizer(text, max_length=100, min_length=20, do_sample=False)
-                return result[0]['summary_text']
-            except Exception as e:
-                self.logger.log_error(f"Refined summarization failed: {e}")
-                return text
+            return self.summarize_batch([text], max_length=100, min_length=20)[0]
         return text
 
-    @lru_cache(maxsize=100)
+    def route_summary(self, text, doc=None):
+        """Summarize ``text`` the cheapest way its length allows (see ``routing.SummaryRouter``)."""
+        return self.router.summarize(text, doc)
+
+    def count_tokens(self, texts):
+        """Summarizer token counts of ``texts``, using only the tokenizer."""
+        tokenizer = self.registry.tokenizer(self.profile.summarization_model)
+        return [len(ids) for ids in tokenizer(list(texts), add_special_tokens=False)['input_ids']]
+
     def analyze_sentiment(self, text):
+        return self.analyze_sentiment_batch([text])[0]
+
+    def summarize_text(self, text):
+        return self.summarize_batch([text])[0]
+
+    @traced('ml.sentiment')
+    def analyze_sentiment_batch(self, texts, batch_size=None):
+        """Signed sentiment scores for ``texts``, computed in padded mini-batches.
+
+        Results are served from the inference cache where possible; only the
+        misses reach the model.
+        """
+        texts = list(texts)
+        if not texts:
+            return []
+        return self.cache.get_or_compute_many(
+            self.sentiment_key, texts, lambda pending: self._analyze_sentiment_uncached(pending, batch_size))
+
+    @traced('ml.summarize')
+    def summarize_batch(self, texts, batch_size=None, max_length=130, min_length=30):
+        """Summaries for ``texts``, computed in padded mini-batches.
+
+        Texts that are already shorter than ``min_length`` tokens are returned
+        unchanged instead of being sent through the summarizer, as are texts
+        whose summarization failed.
+        """
+        texts = list(texts)
+        if not texts:
+            return []
+        summaries = self.cache.get_or_compute_many(
+            self.summarization_key, texts,
+            lambda pending: self._summarize_uncached(pending, batch_size, max_length, min_length),
+            max_length=max_length, min_length=min_length)
+        return [text if summary is None else summary for text, summary in zip(texts, summaries)]
+
+    @traced('ml.sentiment.model')
+    def _analyze_sentiment_uncached(self, texts, batch_size=None):
         try:
-            result = self.sentiment_analyzer(text)
-            score = result[0]['score']
-            label = result[0]['label']
-            return -score if label == 'NEGATIVE' else score
+            results = self.sentiment_analyzer(texts, batch_size=batch_size or self.batch_size, truncation=True)
+            return [-result['score'] if result['label'] == 'NEGATIVE' else result['score'] for result in results]
         except Exception as e:
             self.logger.log_error(f"Error in sentiment analysis: {e}")
-            return None
+            return [None] * len(texts)
 
-    @lru_cache(maxsize=50)
-    def summarize_text(self, text):
+    @traced('ml.summarize.model')
+    def _summarize_uncached(self, texts, batch_size, max_length, min_length):
+        summaries = list(texts)
         try:
-            result = self.summarizer(text, max_length=130, min_length=30, do_sample=False)
-            return result[0]['summary_text']
+            summarizer = self.summarizer
+            token_counts = [len(ids) for ids in summarizer.tokenizer(texts, add_special_tokens=False)['input_ids']]
+            pending = [i for i, count in enumerate(token_counts) if count >= min_length]
+            if pending:
+                results = summarizer([texts[i] for i in pending], batch_size=batch_size or self.batch_size,
+                                     max_length=max_length, min_length=min_length, do_sample=False, truncation=True)
+                for i, result in zip(pending, results):
+                    summaries[i] = result['summary_text']
         except Exception as e:
             self.logger.log_error(f"Error in text summarization: {e}")
-            return text
+            return [None] * len(texts)
+        return summaries
+
+def create_ml_model(logger, **kwargs):
+    """Create an ``MLModel``, or a client of the local inference server when ``INFERENCE_SERVER`` is set.
+
+    ``INFERENCE_SERVER`` is ``host:port`` or a Unix socket path of a running
+    ``inference_server.py``; frontends then share its models instead of loading their own.
+    """
+    address = os.environ.get('INFERENCE_SERVER')
+    if address:
+        from inference_server import RemoteMLModel
+        return RemoteMLModel(logger, address, **kwargs)
+    return MLModel(logger, **kwargs)
 
 if __name__ == "__main__":
     from custom_logger import CustomLogger
@@ -0,0 +1,104 @@
+from functools import cached_property
+from dateutil.parser import parse
+from tracing import span
+
+# Components that only matter for parsing and lemmas; entity extraction does not need them.
+NER_ONLY_DISABLE = ('tagger', 'parser', 'attribute_ruler', 'lemmatizer')
+
+
+def _disabled_components(nlp, ner_only):
+    if not ner_only:
+        return []
+    return [name for name in NER_ONLY_DISABLE if name in nlp.pipe_names]
+
+
+def as_context(text, ml_model, ner_only=False):
+    """Wrap ``text`` in an ``AnalysisContext`` unless it already is one."""
+    if isinstance(text, AnalysisContext):
+        return text
+    return AnalysisContext(text, ml_model, ner_only=ner_only)
+
+
+def extract_entities(text, ml_model):
+    """``(text, label)`` pairs of the named entities in ``text`` or an ``AnalysisContext``."""
+    return as_context(text, ml_model, ner_only=True).entities
+
+
+def parse_dates(text, ml_model):
+    """DATE entities of ``text`` normalized to ``YYYY-MM-DD``; ones dateutil cannot read are skipped."""
+    dates = []
+    for date in as_context(text, ml_model, ner_only=True).date_entities:
+        try:
+            dates.append(parse(date, fuzzy=True).strftime('%Y-%m-%d'))
+        except (ValueError, OverflowError):
+            continue  # e.g. "the holiday season"
+    return dates
+
+
+class AnalysisContext:
+    """One utterance, parsed once, with every derived analysis computed lazily from the same ``Doc``.
+
+    Entity extraction, date parsing, sentence splitting, sentiment and summary
+    all read from ``self.doc`` instead of re-running the spaCy pipeline. With
+    ``ner_only=True`` the parser and lemmatizer are skipped; sentences then
+    fall back to the whole text, and ``process()``, which needs sentence
+    boundaries, parses the text again with the full pipeline.
+    """
+
+    def __init__(self, text, ml_model, doc=None, ner_only=False):
+        self.text = text
+        self.ml_model = ml_model
+        self.ner_only = ner_only
+        if doc is not None:
+            self.__dict__['doc'] = doc
+
+    @classmethod
+    def bulk(cls, texts, ml_model, n_process=1, batch_size=32, ner_only=False):
+        """Parse a backlog of transcripts with ``nlp.pipe`` and return one context per text."""
+        texts = list(texts)
+        nlp = ml_model.nlp
+        docs = nlp.pipe(texts, n_process=n_process, batch_size=batch_size,
+                        disable=_disabled_components(nlp, ner_only))
+        return [cls(text, ml_model, doc=doc, ner_only=ner_only) for text, doc in zip(texts, docs)]
+
+    @cached_property
+    def doc(self):
+        nlp = self.ml_model.nlp
+        with span('spacy.parse', ner_only=self.ner_only):
+            return nlp(self.text, disable=_disabled_components(nlp, self.ner_only))
+
+    @cached_property
+    def sentence_doc(self):
+        """``self.doc`` if it has sentence boundaries, otherwise a full-pipeline parse of the text."""
+        if self.doc.has_annotation('SENT_START'):
+            return self.doc
+        nlp = self.ml_model.nlp
+        with span('spacy.parse', ner_only=False):
+            return nlp(self.text)
+
+    @cached_property
+    def entities(self):
+        return [(ent.text, ent.label_) for ent in self.doc.ents]
+
+    @cached_property
+    def date_entities(self):
+        return [ent.text for ent in self.doc.ents if ent.label_ == 'DATE']
+
+    @cached_property
+    def sentences(self):
+        if not self.doc.has_annotation('SENT_START'):
+            return [self.text]
+        return [sent.text for sent in self.doc.sents]
+
+    @cached_property
+    def sentiment(self):
+        return self.ml_model.analyze_sentiment(self.text)
+
+    @cached_property
+    def summary(self):
+        # Length-routed: short commands skip summarization, medium texts are summarized extractively
+        return self.ml_model.route_summary(self.text, self.doc)
+
+    def process(self):
+        """Entity-grouped sentence analysis, as ``MLModel.process_text`` returns it."""
+        return self.ml_model.process_docs([self.sentence_doc])[0]
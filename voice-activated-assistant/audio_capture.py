@@ -0,0 +1,290 @@
+import logging
+import math
+import time
+import wave
+import numpy as np
+import speech_recognition as sr
+
+logger = logging.getLogger(__name__)
+
+_SAMPLE_DTYPES = {1: np.uint8, 2: np.int16, 4: np.int32}
+
+
+def _samples(chunk, sample_width):
+    samples = np.frombuffer(chunk, dtype=_SAMPLE_DTYPES[sample_width]).astype(np.float64)
+    if sample_width == 1:
+        samples -= 128.0  # 8-bit PCM is unsigned
+    return samples
+
+
+def rms(chunk, sample_width):
+    """Root-mean-square level of a raw PCM chunk."""
+    samples = _samples(chunk, sample_width)
+    if not samples.size:
+        return 0.0
+    return float(np.sqrt(np.mean(samples * samples)))
+
+
+def rms_many(chunks, sample_width):
+    """RMS levels of many chunks, computed in one vectorized pass when they share a length."""
+    chunks = list(chunks)
+    if not chunks:
+        return np.zeros(0)
+    if len({len(chunk) for chunk in chunks}) != 1:
+        return np.array([rms(chunk, sample_width) for chunk in chunks])
+    samples = _samples(b''.join(chunks), sample_width).reshape(len(chunks), -1)
+    return np.sqrt(np.mean(samples * samples, axis=1))
+
+
+class MicrophoneSource:
+    """Raw audio chunks read from an ``sr.Microphone``."""
+
+    def __init__(self, microphone):
+        self.microphone = microphone
+        self.sample_rate = microphone.SAMPLE_RATE
+        self.sample_width = microphone.SAMPLE_WIDTH
+        self.chunk_size = microphone.CHUNK
+
+    def chunks(self):
+        with self.microphone as source:
+            while True:
+                yield source.stream.read(self.chunk_size)
+
+
+class WavFileSource:
+    """Raw audio chunks read from a mono WAV file, for tests and replays.
+
+    With ``realtime=True`` chunks are paced at the file's sample rate to mimic a
+    live microphone.
+    """
+
+    def __init__(self, path, chunk_size=1024, realtime=False):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.realtime = realtime
+        with wave.open(path, 'rb') as wav:
+            self.sample_rate = wav.getframerate()
+            self.sample_width = wav.getsampwidth()
+
+    def chunks(self):
+        chunk_seconds = self.chunk_size / self.sample_rate
+        with wave.open(self.path, 'rb') as wav:
+            while True:
+                data = wav.readframes(self.chunk_size)
+                if not data:
+                    return
+                yield data
+                if self.realtime:
+                    time.sleep(chunk_seconds)
+
+
+class NoiseFloorTracker:
+    """Energy threshold that follows the background noise level.
+
+    Keeps the RMS levels of the most recent ``window_size`` non-speech chunks in
+    a ring buffer and sets the threshold to ``multiplier`` times their mean,
+    never below ``min_threshold``.
+    """
+
+    def __init__(self, window_size=64, multiplier=1.5, min_threshold=50):
+        self.multiplier = multiplier
+        self.min_threshold = min_threshold
+        self._levels = np.zeros(window_size, dtype=np.float64)
+        self._count = 0
+        self._index = 0
+        self.threshold = float(min_threshold)
+
+    def calibrate(self, levels):
+        """Reset the window from calibration levels recorded before anyone spoke."""
+        levels = np.asarray(levels, dtype=np.float64)[-len(self._levels):]
+        self._levels[:len(levels)] = levels
+        self._count = len(levels)
+        self._index = len(levels) % len(self._levels)
+        self._update()
+
+    def observe(self, level):
+        self._levels[self._index] = level
+        self._index = (self._index + 1) % len(self._levels)
+        self._count = min(self._count + 1, len(self._levels))
+        self._update()
+
+    def _update(self):
+        if self._count:
+            self.threshold = max(self.min_threshold, self.multiplier * float(self._levels[:self._count].mean()))
+
+
+class EnergySegmenter:
+    """Energy-based voice activity detection that cuts a chunk stream into utterances.
+
+    An utterance starts at the first chunk whose RMS exceeds the energy
+    threshold and ends after ``pause_seconds`` of quieter audio or
+    ``max_speech_seconds`` of speech. Segments shorter than
+    ``min_speech_seconds`` are dropped as noise. With a ``noise_floor`` the
+    threshold comes from the tracker, which is fed every non-speech chunk;
+    otherwise the fixed ``energy_threshold`` is used.
+
+    ``playback`` returns True while the assistant is speaking, when the
+    microphone also hears the reply. During playback the threshold is raised
+    ``playback_multiplier`` times, the noise floor is left alone, and an
+    utterance only starts after ``barge_in_chunks`` consecutive chunks above
+    it; anything shorter is dropped rather than captured as the next turn.
+    """
+
+    def __init__(self, sample_rate, sample_width, energy_threshold=300, pause_seconds=0.8,
+                 min_speech_seconds=0.3, max_speech_seconds=15, on_speech_start=None, noise_floor=None,
+                 playback=None, playback_multiplier=3.0, barge_in_chunks=4):
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.energy_threshold = energy_threshold
+        self.pause_seconds = pause_seconds
+        self.min_speech_seconds = min_speech_seconds
+        self.max_speech_seconds = max_speech_seconds
+        self.on_speech_start = on_speech_start
+        self.noise_floor = noise_floor
+        self.playback = playback
+        self.playback_multiplier = playback_multiplier
+        self.barge_in_chunks = barge_in_chunks
+        self._onset = []
+        self._frames = []
+        self._speech_seconds = 0.0
+        self._silence_seconds = 0.0
+
+    def is_speech(self, chunk, playing=False):
+        level = rms(chunk, self.sample_width)
+        factor = self.playback_multiplier if playing else 1.0
+        if self.noise_floor is None:
+            return level > self.energy_threshold * factor
+        if level > self.noise_floor.threshold * factor:
+            return True
+        if not playing:  # the reply's echo is not background noise
+            self.noise_floor.observe(level)
+        return False
+
+    def feed(self, chunk):
+        """Add a chunk; return the utterance's raw bytes when one has just ended, else None."""
+        seconds = len(chunk) / (self.sample_width * self.sample_rate)
+        playing = self.playback is not None and self.playback()
+        speech = self.is_speech(chunk, playing)
+        if not self._frames:
+            if not speech:
+                self._onset = []
+                return None
+            if playing:
+                self._onset.append(chunk)
+                if len(self._onset) < self.barge_in_chunks:
+                    return None
+            # The earlier onset chunks open the utterance; this one is appended below
+            onset, self._onset = self._onset[:-1], []
+            self._frames.extend(onset)
+            self._speech_seconds += seconds * len(onset)
+            if self.on_speech_start is not None:
+                self.on_speech_start()
+        self._frames.append(chunk)
+        if speech:
+            self._speech_seconds += seconds
+            self._silence_seconds = 0.0
+        else:
+            self._silence_seconds += seconds
+        if self._silence_seconds >= self.pause_seconds or self._speech_seconds >= self.max_speech_seconds:
+            return self.flush()
+        return None
+
+    def flush(self):
+        """End the current utterance, returning its bytes or None if it was too short."""
+        frames, speech_seconds = self._frames, self._speech_seconds
+        self._frames = []
+        self._onset = []
+        self._speech_seconds = 0.0
+        self._silence_seconds = 0.0
+        if speech_seconds < self.min_speech_seconds:
+            return None
+        return b''.join(frames)
+
+
+class AudioCaptureSession:
+    """A capture source kept open across turns, with a continuously adapting energy threshold.
+
+    The threshold is calibrated once from the first ``calibration_seconds`` of
+    audio, then follows the noise level of the last ``window_seconds`` of
+    non-speech audio. Because the source stays open, turns pay neither the
+    calibration delay nor the cost of reopening the device. A session can be
+    used as a chunk source for ``SpeechPipeline`` or queried turn by turn with
+    ``listen()``. ``stop()`` may be called from any thread: the stream then
+    ends within one chunk, so a blocked ``listen()`` returns None.
+    """
+
+    def __init__(self, source, calibration_seconds=1.0, window_seconds=5.0, multiplier=1.5,
+                 min_threshold=50, **segmenter_options):
+        self.source = source
+        self.sample_rate = source.sample_rate
+        self.sample_width = source.sample_width
+        self.calibration_seconds = calibration_seconds
+        chunk_size = getattr(source, 'chunk_size', 1024)
+        self.chunk_seconds = chunk_size / self.sample_rate
+        self.noise_floor = NoiseFloorTracker(window_size=max(1, math.ceil(window_seconds / self.chunk_seconds)),
+                                             multiplier=multiplier, min_threshold=min_threshold)
+        self.segmenter = self.make_segmenter(**segmenter_options)
+        self._chunks = None
+        self._stopping = False
+
+    def make_segmenter(self, **options):
+        return EnergySegmenter(self.sample_rate, self.sample_width, noise_floor=self.noise_floor, **options)
+
+    def open(self):
+        if self._chunks is None:
+            self._chunks = iter(self.source.chunks())
+            self.calibrate()
+        return self
+
+    def calibrate(self):
+        calibration = []
+        for chunk in self._chunks:
+            calibration.append(chunk)
+            if len(calibration) * self.chunk_seconds >= self.calibration_seconds:
+                break
+        if calibration:
+            self.noise_floor.calibrate(rms_many(calibration, self.sample_width))
+        logger.info(f"Calibrated energy threshold to {self.noise_floor.threshold:.1f}")
+
+    def stop(self):
+        """End the stream; the thread reading it sees the end after its current chunk."""
+        self._stopping = True
+
+    def _live_chunks(self):
+        for chunk in self._chunks:
+            if self._stopping:
+                # Release the device from the thread that was reading it
+                self.close()
+                return
+            yield chunk
+
+    def chunks(self):
+        if self._stopping:
+            return
+        self.open()
+        yield from self._live_chunks()
+
+    def listen(self):
+        """Block until the next utterance ends and return it as ``sr.AudioData``, or None at end of stream."""
+        if self._stopping:
+            return None
+        self.open()
+        for chunk in self._live_chunks():
+            frame_data = self.segmenter.feed(chunk)
+            if frame_data is not None:
+                return sr.AudioData(frame_data, self.sample_rate, self.sample_width)
+        frame_data = self.segmenter.flush()
+        if frame_data is not None and not self._stopping:
+            return sr.AudioData(frame_data, self.sample_rate, self.sample_width)
+        return None
+
+    def close(self):
+        if self._chunks is not None and hasattr(self._chunks, 'close'):
+            self._chunks.close()
+        self._chunks = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, *exc_info):
+        self.close()
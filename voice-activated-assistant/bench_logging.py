@@ -0,0 +1,51 @@
+"""Compare the per-record cost of the synchronous and queue-backed encrypted log handlers.
+
+Usage: python bench_logging.py [--records 20000]
+
+Reports the time the logging call takes on the calling thread, and the total
+time until every record has been encrypted and written.
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+from cryptography.fernet import Fernet
+from utilities import AsyncEncryptedFileHandler, EncryptedFileHandler, iter_encrypted_log
+
+MESSAGE = "Entities: [('Paris', 'GPE'), ('tomorrow', 'DATE')], Sentiment: 0.93, Summary: %s"
+
+
+def run(handler_class, records, key, directory):
+    path = os.path.join(directory, f"{handler_class.__name__}.log")
+    handler = handler_class(path, maxBytes=1_000_000, backupCount=50, encryption_key=key)
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    logger = logging.getLogger(f"bench.{handler_class.__name__}")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+    start = time.perf_counter()
+    for i in range(records):
+        logger.info(MESSAGE, f"utterance number {i}")
+    call_seconds = time.perf_counter() - start
+    handler.close()
+    total_seconds = time.perf_counter() - start
+    logger.removeHandler(handler)
+    written = sum(1 for _ in iter_encrypted_log(path, key, include_backups=True))
+    return call_seconds, total_seconds, written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--records', type=int, default=20000)
+    args = parser.parse_args()
+    key = Fernet.generate_key()
+    with tempfile.TemporaryDirectory() as directory:
+        for handler_class in (EncryptedFileHandler, AsyncEncryptedFileHandler):
+            call_seconds, total_seconds, written = run(handler_class, args.records, key, directory)
+            print(f"{handler_class.__name__:>26}: {call_seconds / args.records * 1e6:7.1f} us/record on caller, "
+                  f"{total_seconds / args.records * 1e6:7.1f} us/record end to end, {written} records read back")
+
+
+if __name__ == '__main__':
+    main()
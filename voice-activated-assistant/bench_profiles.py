@@ -0,0 +1,130 @@
+"""Compare the performance profiles for accuracy and latency over a fixed sample corpus.
+
+Usage: python bench_profiles.py [--profiles accurate,balanced,fast] [--json results.json]
+
+Sentiment is scored against the corpus labels. Entities and summaries are
+scored against the ``accurate`` profile's output (token-overlap F1), since
+the corpus has no reference summaries.
+"""
+import argparse
+import json
+import time
+from ML import MLModel
+from inference_cache import InferenceCache
+from model_registry import ModelRegistry
+from profiles import PROFILES
+from utilities import percentile
+
+# (text, expected sentiment sign)
+SAMPLE_CORPUS = [
+    ("Hey, what time is it?", 1),
+    ("Remind me to call Sarah at Microsoft tomorrow at 3 pm.", 1),
+    ("The delivery from Amazon was late again and the package was damaged. I'm really disappointed with how this was handled.", -1),
+    ("I loved the concert in Berlin last weekend; the band played for almost three hours and the crowd was fantastic.", 1),
+    ("My flight to New York on Friday was cancelled, and the airline has not offered a refund or an alternative.", -1),
+    ("Apple announced a new laptop on Tuesday. Analysts expect strong sales over the holiday season, "
+     "although supply constraints in Asia could limit availability in some markets until early next year.", 1),
+    ("The meeting with the finance team went badly. Nobody had read the report, the budget numbers were wrong, "
+     "and we have to redo the whole presentation before Monday.", -1),
+    ("Thanks, that was really helpful!", 1),
+    ("The city council voted on Wednesday to expand the bike lane network downtown. Supporters say it will reduce "
+     "traffic and pollution, while some shop owners worry about losing parking spaces in front of their stores. "
+     "Construction is planned to start in the spring and last about eighteen months.", 1),
+    ("I can't get the printer to work and the support line keeps hanging up on me.", -1),
+]
+
+
+def token_f1(reference, candidate):
+    reference, candidate = set(reference.lower().split()), set(candidate.lower().split())
+    if not reference or not candidate:
+        return float(reference == candidate)
+    overlap = len(reference & candidate)
+    if not overlap:
+        return 0.0
+    precision, recall = overlap / len(candidate), overlap / len(reference)
+    return 2 * precision * recall / (precision + recall)
+
+
+def set_f1(reference, candidate):
+    reference, candidate = set(reference), set(candidate)
+    if not reference and not candidate:
+        return 1.0
+    overlap = len(reference & candidate)
+    return 2 * overlap / (len(reference) + len(candidate))
+
+
+class _PrintLogger:
+    def log_info(self, message):
+        print(message)
+
+    def log_error(self, message):
+        print(f"ERROR: {message}")
+
+
+def run_profile(name, repeat):
+    # A fresh registry and cache per profile, so load times and latencies are not shared
+    model = MLModel(_PrintLogger(), registry=ModelRegistry(), cache=InferenceCache(max_entries=0), profile=name)
+    start = time.perf_counter()
+    model.nlp
+    model.init_transformers_models()
+    load_seconds = time.perf_counter() - start
+
+    outputs = []
+    latencies = {'parse': [], 'sentiment': [], 'summary': []}
+    for _ in range(repeat):
+        outputs = []
+        for text, _ in SAMPLE_CORPUS:
+            began = time.perf_counter()
+            doc = model.nlp(text)
+            latencies['parse'].append(time.perf_counter() - began)
+            began = time.perf_counter()
+            sentiment = model.analyze_sentiment(text)
+            latencies['sentiment'].append(time.perf_counter() - began)
+            began = time.perf_counter()
+            summary = model.summarize_text(text)
+            latencies['summary'].append(time.perf_counter() - began)
+            outputs.append({'entities': [(ent.text, ent.label_) for ent in doc.ents], 'sentiment': sentiment, 'summary': summary})
+    return load_seconds, latencies, outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--profiles', default=','.join(PROFILES))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+    names = [name.strip() for name in args.profiles.split(',')]
+    if 'accurate' not in names:
+        names.insert(0, 'accurate')  # the reference for entity and summary agreement
+
+    runs = {name: run_profile(name, args.repeat) for name in names}
+    reference = runs['accurate'][2]
+    results = []
+    for name, (load_seconds, latencies, outputs) in runs.items():
+        correct = sum(1 for (_, label), output in zip(SAMPLE_CORPUS, outputs)
+                      if output['sentiment'] is not None and (output['sentiment'] > 0) == (label > 0))
+        result = {
+            'profile': name,
+            'load_seconds': load_seconds,
+            'sentiment_accuracy': correct / len(SAMPLE_CORPUS),
+            'entity_f1_vs_accurate': sum(set_f1(ref['entities'], out['entities']) for ref, out in zip(reference, outputs)) / len(outputs),
+            'summary_f1_vs_accurate': sum(token_f1(ref['summary'], out['summary']) for ref, out in zip(reference, outputs)) / len(outputs),
+        }
+        for stage, values in latencies.items():
+            result[f'{stage}_p50_ms'] = percentile(values, 50) * 1000
+            result[f'{stage}_p95_ms'] = percentile(values, 95) * 1000
+        results.append(result)
+
+    for result in results:
+        print(f"{result['profile']:>9}: load {result['load_seconds']:.1f}s, "
+              f"summary p50 {result['summary_p50_ms']:.0f} ms / p95 {result['summary_p95_ms']:.0f} ms, "
+              f"sentiment p50 {result['sentiment_p50_ms']:.0f} ms, parse p50 {result['parse_p50_ms']:.0f} ms, "
+              f"sentiment acc {result['sentiment_accuracy']:.0%}, "
+              f"entity F1 {result['entity_f1_vs_accurate']:.2f}, summary F1 {result['summary_f1_vs_accurate']:.2f}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
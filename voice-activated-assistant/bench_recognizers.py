@@ -0,0 +1,108 @@
+"""Run a directory of WAV files through each recognizer backend and report latency and throughput.
+
+Usage: python bench_recognizers.py samples/ --backends vosk,whisper,google [--json results.json]
+
+A ``name.txt`` file next to ``name.wav`` is used as its reference transcript:
+the stub backend returns it, and the other backends are scored against it by
+word error rate.
+"""
+import argparse
+import glob
+import json
+import os
+import time
+import speech_recognition as sr
+from recognition_backends import BACKENDS, StubBackend, create_backend
+from utilities import percentile
+
+
+def load_samples(directory):
+    samples = []
+    for path in sorted(glob.glob(os.path.join(directory, '*.wav'))):
+        with sr.AudioFile(path) as source:
+            audio = sr.Recognizer().record(source)
+        transcript_path = os.path.splitext(path)[0] + '.txt'
+        transcript = None
+        if os.path.exists(transcript_path):
+            with open(transcript_path) as f:
+                transcript = f.read().strip()
+        samples.append((path, audio, transcript))
+    return samples
+
+
+def word_error_rate(reference, hypothesis):
+    ref, hyp = reference.lower().split(), hypothesis.lower().split()
+    distances = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        previous, distances[0] = distances[0], i
+        for j, hyp_word in enumerate(hyp, 1):
+            previous, distances[j] = distances[j], min(distances[j] + 1, distances[j - 1] + 1,
+                                                       previous + (ref_word != hyp_word))
+    return distances[-1] / len(ref) if ref else float(bool(hyp))
+
+
+def benchmark(backend, samples, repeat=1):
+    latencies, errors = [], []
+    audio_seconds = 0.0
+    failures = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for path, audio, transcript in samples:
+            audio_seconds += len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
+            began = time.perf_counter()
+            try:
+                text = backend.transcribe(audio)
+            except (sr.UnknownValueError, sr.RequestError):
+                text = ''
+                failures += 1
+            latencies.append(time.perf_counter() - began)
+            if transcript is not None:
+                errors.append(word_error_rate(transcript, text))
+    elapsed = time.perf_counter() - start
+    return {
+        'backend': backend.name,
+        'utterances': len(latencies),
+        'failures': failures,
+        'latency_p50': percentile(latencies, 50),
+        'latency_p95': percentile(latencies, 95),
+        'utterances_per_second': len(latencies) / elapsed if elapsed else None,
+        'audio_seconds_per_second': audio_seconds / elapsed if elapsed else None,
+        'rtf_mean': backend.metrics()['rtf_mean'],
+        'wer_mean': sum(errors) / len(errors) if errors else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('directory', help='directory of WAV files')
+    parser.add_argument('--backends', default='stub', help=f"comma-separated list of {', '.join(BACKENDS)}")
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+
+    samples = load_samples(args.directory)
+    if not samples:
+        parser.error(f"No WAV files found in {args.directory}")
+    results = []
+    for name in args.backends.split(','):
+        backend = create_backend(name.strip())
+        if isinstance(backend, StubBackend):
+            for path, audio, transcript in samples:
+                if transcript is not None:
+                    backend.register(audio, transcript)
+        results.append(benchmark(backend, samples, args.repeat))
+
+    for result in results:
+        print(f"{result['backend']:>8}: p50 {result['latency_p50'] * 1000:.1f} ms, "
+              f"p95 {result['latency_p95'] * 1000:.1f} ms, "
+              f"{result['utterances_per_second']:.2f} utt/s, "
+              f"{result['audio_seconds_per_second']:.2f} audio s/s, "
+              f"{result['failures']} failures"
+              + (f", WER {result['wer_mean']:.2%}" if result['wer_mean'] is not None else ''))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,270 @@
+"""Replay a corpus of recorded utterances through the assistant's pipeline stages and record their cost.
+
+Usage: python bench_replay.py [--corpus DIR] [--repeat 3] [--json results.json] [--compare baseline.json]
+
+The corpus directory holds one ``NAME.txt`` transcript per utterance and,
+optionally, the recording ``NAME.wav`` (16-bit mono). Recordings are segmented
+by the energy VAD from a ``WavFileSource`` and transcribed by the ``stub``
+backend, which returns the transcript; pass ``--backend vosk`` or
+``--backend whisper`` to time a real offline recognizer instead (its word
+error rate against the transcripts is reported). Without ``--corpus`` the
+text-only sample corpus of ``bench_profiles.py`` is replayed. Speech output
+goes to a silent stand-in engine, so no microphone, network or audio device
+is needed.
+
+Each utterance runs through capture, recognition, ``extract_entities``,
+``parse_dates``, ``MLModel.analyze_sentiment``/``summarize_text``/
+``process_text``, ``ChatDatabase.update_response_frequency``, an
+``EncryptedFileHandler`` log record and TTS. Stage latencies come from the
+tracer, so the models' and database's own spans (``ml.*``, ``spacy.parse``,
+``db.*``) are reported alongside the replay stages. ``--compare`` prints the
+change against an earlier results file and exits with status 1 if a stage's
+p95, the throughput or the peak RSS regressed by more than ``--threshold``.
+"""
+import argparse
+import asyncio
+import glob
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+import speech_recognition as sr
+from cryptography.fernet import Fernet
+from analysis_context import extract_entities, parse_dates
+from audio_capture import AudioCaptureSession, WavFileSource
+from bench_profiles import SAMPLE_CORPUS, _PrintLogger
+from bench_recognizers import word_error_rate
+from database_interaction import ChatDatabase
+from inference_cache import InferenceCache
+from ML import MLModel
+from model_registry import current_rss, peak_rss
+from recognition_backends import StubBackend, create_backend
+from tracing import get_tracer, span
+from tts_worker import TTSWorker
+from utilities import EncryptedFileHandler
+
+
+class SilentEngine:
+    """pyttsx3 stand-in that accepts everything and produces no sound."""
+
+    def connect(self, topic, callback):
+        pass
+
+    def say(self, text):
+        pass
+
+    def save_to_file(self, text, path):
+        pass
+
+    def runAndWait(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+def load_corpus(directory):
+    """Return ``[{'name', 'text', 'wav'}]`` for the transcripts in ``directory`` (the sample corpus if None)."""
+    if directory is None:
+        return [{'name': f'sample-{i}', 'text': text, 'wav': None} for i, (text, _) in enumerate(SAMPLE_CORPUS)]
+    utterances = []
+    for path in sorted(glob.glob(os.path.join(directory, '*.txt'))):
+        stem = os.path.splitext(path)[0]
+        with open(path, encoding='utf-8') as f:
+            text = f.read().strip()
+        utterances.append({'name': os.path.basename(stem), 'text': text,
+                           'wav': stem + '.wav' if os.path.exists(stem + '.wav') else None})
+    if not utterances:
+        raise SystemExit(f"No transcripts (*.txt) found in {directory}")
+    return utterances
+
+
+def capture(path, calibration_seconds):
+    """Segment a recording with the energy VAD and join the speech into one ``sr.AudioData``."""
+    with AudioCaptureSession(WavFileSource(path), calibration_seconds=calibration_seconds) as session:
+        segments = []
+        while True:
+            audio = session.listen()
+            if audio is None:
+                break
+            segments.append(audio.frame_data)
+    if not segments:  # nothing above the threshold; recognize the whole file
+        with wave.open(path, 'rb') as wav:
+            segments.append(wav.readframes(wav.getnframes()))
+    return sr.AudioData(b''.join(segments), session.sample_rate, session.sample_width)
+
+
+def replay(utterances, args, directory):
+    model = MLModel(_PrintLogger(), cache=None if args.cache else InferenceCache(max_entries=0), profile=args.profile)
+    backend = StubBackend() if args.backend == 'stub' else create_backend(args.backend)
+    tts = TTSWorker(engine_factory=SilentEngine, cache_dir=None)
+    tts.start()
+
+    log_handler = EncryptedFileHandler(os.path.join(directory, 'replay.log'), maxBytes=1_000_000, backupCount=5,
+                                       encryption_key=Fernet.generate_key())
+    log_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    log = logging.getLogger('bench.replay')
+    log.propagate = False
+    log.setLevel(logging.INFO)
+    log.addHandler(log_handler)
+
+    loop = asyncio.new_event_loop()
+    database = ChatDatabase(os.path.join(directory, 'replay.db'))
+    database.logger.setLevel(logging.WARNING)
+    loop.run_until_complete(database.init_db())
+
+    # Load the models before timing anything, so the first utterance is not charged for them
+    start = time.perf_counter()
+    model.nlp
+    model.init_transformers_models()
+    load_seconds = time.perf_counter() - start
+
+    tracer = get_tracer()
+    tracer.enabled = True
+    tracer.window = max(tracer.window, len(utterances) * args.repeat)
+    tracer.reset()
+
+    errors = []
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for utterance in utterances:
+            with span('replay.turn'):
+                text = utterance['text']
+                if utterance['wav']:
+                    with span('replay.capture'):
+                        audio = capture(utterance['wav'], args.calibration_seconds)
+                    if isinstance(backend, StubBackend):
+                        backend.register(audio, text)
+                    with span('replay.recognize'):
+                        try:
+                            text = backend.transcribe(audio)
+                        except sr.UnknownValueError:
+                            text = ''
+                    if not isinstance(backend, StubBackend):
+                        errors.append(word_error_rate(utterance['text'], text))
+                if not text:
+                    continue
+                with span('replay.extract_entities'):
+                    entities = extract_entities(text, model)
+                with span('replay.parse_dates'):
+                    parse_dates(text, model)
+                with span('replay.analyze_sentiment'):
+                    sentiment = model.analyze_sentiment(text)
+                with span('replay.summarize_text'):
+                    summary = model.summarize_text(text)
+                with span('replay.process_text'):
+                    model.process_text(text)
+                with span('replay.update_response_frequency'):
+                    loop.run_until_complete(database.update_response_frequency(summary))
+                with span('replay.log'):
+                    log.info(f"Processed interaction: Text: '{text}', Entities: {entities}, "
+                             f"Sentiment: {sentiment}, Summary: {summary}")
+                with span('replay.tts'):
+                    tts.say(summary)
+                    tts.wait_until_idle()
+    with span('replay.database_close'):
+        loop.run_until_complete(database.close())
+    wall_seconds = time.perf_counter() - start
+
+    log.removeHandler(log_handler)
+    log_handler.close()
+    tts.stop()
+    loop.close()
+    tracer.enabled = False
+
+    turns = len(utterances) * args.repeat
+    return {
+        'profile': model.profile.name,
+        'backend': args.backend,
+        'utterances': len(utterances),
+        'recordings': sum(1 for utterance in utterances if utterance['wav']),
+        'repeat': args.repeat,
+        'cache': args.cache,
+        'load_seconds': load_seconds,
+        'wall_seconds': wall_seconds,
+        'throughput_per_second': turns / wall_seconds if wall_seconds else None,
+        'peak_rss_bytes': peak_rss(),
+        'final_rss_bytes': current_rss(),
+        'word_error_rate': sum(errors) / len(errors) if errors else None,
+        'stages': tracer.summary(),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline, result, threshold):
+    """Print the change of every shared metric and return the ones that regressed by more than ``threshold``."""
+    regressions = []
+
+    def check(label, old, new, higher_is_worse=True):
+        if not old or new is None:
+            return
+        change = new / old - 1
+        worse = change > threshold if higher_is_worse else change < -threshold
+        print(f"{label:>48}: {old:10.2f} -> {new:10.2f} ({change:+.0%}){'  REGRESSION' if worse else ''}")
+        if worse:
+            regressions.append(label)
+
+    check('throughput (turns/s)', baseline.get('throughput_per_second'), result['throughput_per_second'],
+          higher_is_worse=False)
+    check('peak RSS (MiB)', (baseline.get('peak_rss_bytes') or 0) / 2**20, (result['peak_rss_bytes'] or 0) / 2**20)
+    for stage, stats in sorted(result['stages'].items()):
+        old = baseline.get('stages', {}).get(stage)
+        if old:
+            check(f'{stage} p95 (ms)', old['p95_ms'], stats['p95_ms'])
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--corpus', help='directory of NAME.txt transcripts and optional NAME.wav recordings')
+    parser.add_argument('--profile', help='performance profile (default: ASSISTANT_PROFILE or accurate)')
+    parser.add_argument('--backend', default='stub', help='recognizer for the recordings: stub, vosk or whisper')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--cache', action='store_true', help='keep the inference cache on (off by default)')
+    parser.add_argument('--calibration-seconds', type=float, default=0.25)
+    parser.add_argument('--json', help='write results to this file')
+    parser.add_argument('--compare', help='results file of an earlier run to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='relative change counted as a regression')
+    args = parser.parse_args()
+
+    utterances = load_corpus(args.corpus)
+    baseline = None
+    if args.compare:  # read first: --json may overwrite the same file
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    with tempfile.TemporaryDirectory() as directory:
+        result = replay(utterances, args, directory)
+    result['commit'] = git_commit()
+    result['timestamp'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+
+    print(f"{result['utterances']} utterances x {result['repeat']}: {result['throughput_per_second']:.2f} turns/s, "
+          f"models loaded in {result['load_seconds']:.1f}s"
+          + (f", peak RSS {result['peak_rss_bytes'] / 2**20:.0f} MiB" if result['peak_rss_bytes'] else "")
+          + (f", WER {result['word_error_rate']:.1%}" if result['word_error_rate'] is not None else ""))
+    for stage, stats in sorted(result['stages'].items()):
+        print(f"{stage:>40}: n={stats['count']:<5} p50 {stats['p50_ms']:8.2f} ms  p95 {stats['p95_ms']:8.2f} ms  "
+              f"p99 {stats['p99_ms']:8.2f} ms")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2)
+
+    if baseline is not None:
+        print(f"\nCompared with {args.compare} (commit {baseline.get('commit')}):")
+        regressions = compare(baseline, result, args.threshold)
+        if regressions:
+            raise SystemExit(f"{len(regressions)} metric(s) regressed by more than {args.threshold:.0%}")
+
+
+if __name__ == '__main__':
+    main()
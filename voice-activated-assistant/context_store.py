@@ -0,0 +1,225 @@
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict, deque
+from database_interaction import BatchedWriter
+from inference_cache import normalize_text
+from tracing import traced
+
+logger = logging.getLogger(__name__)
+
+TURN_KEY = 'turn'
+SUMMARY_KEY = 'rolling_summary'
+
+INSERT_CONTEXT_SQL = 'INSERT INTO Contexts (session_id, context_key, context_value) VALUES (?, ?, ?)'
+DELETE_CONTEXT_SQL = 'DELETE FROM Contexts WHERE session_id = ? AND context_key = ?'
+# Both lookups are served by idx_contexts_session_key; the rowid orders rows within it
+RECENT_CONTEXTS_SQL = '''
+    SELECT context_value FROM Contexts
+    WHERE session_id = ? AND context_key = ?
+    ORDER BY id DESC LIMIT ?
+'''
+
+
+class Turn:
+    """One analyzed utterance: its text and the entities, sentiment and summary computed for it."""
+
+    __slots__ = ('text', 'entities', 'sentiment', 'summary', 'timestamp')
+
+    def __init__(self, text, entities=(), sentiment=None, summary=None, timestamp=None):
+        self.text = text
+        self.entities = tuple(tuple(entity) for entity in entities)
+        self.sentiment = sentiment
+        self.summary = summary
+        self.timestamp = timestamp if timestamp is not None else time.time()
+
+    def to_json(self):
+        return json.dumps([self.text, self.entities, self.sentiment, self.summary, self.timestamp])
+
+    @classmethod
+    def from_json(cls, value):
+        return cls(*json.loads(value))
+
+    def analysis(self):
+        """The turn as ``analyze_text`` returns it: ``(entities, sentiment, summary)``."""
+        return list(self.entities), self.sentiment, self.summary
+
+
+class Session:
+    """The most recent turns of one conversation and its rolling summary."""
+
+    __slots__ = ('session_id', 'turns', 'summary', 'lock')
+
+    def __init__(self, session_id, window):
+        self.session_id = session_id
+        self.turns = deque(maxlen=window)
+        self.summary = ''
+        self.lock = asyncio.Lock()
+
+    def find(self, text):
+        key = normalize_text(text)
+        for turn in reversed(self.turns):
+            if normalize_text(turn.text) == key:
+                return turn
+        return None
+
+    def entities(self):
+        """Distinct entities mentioned in the window, most recent first."""
+        seen = {}
+        for turn in reversed(self.turns):
+            for entity in turn.entities:
+                seen.setdefault(entity, None)
+        return list(seen)
+
+
+class ContextStore:
+    """Per-session conversation memory on top of the ``Contexts`` table.
+
+    Each session keeps its last ``window`` turns in memory. Turns are written to
+    ``Contexts`` in batches, once ``flush_every`` rows are pending or
+    ``flush_interval`` seconds after the first one, together with the latest
+    rolling summary of every session that changed, which replaces the
+    session's previous one; a batch whose write fails stays pending for the
+    next flush (see ``BatchedWriter``). A session that is not in memory is
+    hydrated on first access from its most recent rows; at most
+    ``max_sessions`` sessions are held, least recently used first out.
+
+    The rolling summary is updated from each new turn alone: the turn's summary
+    is appended to the previous rolling summary, and only when that exceeds
+    ``summary_tokens`` is the previous part condensed with
+    ``ml_model.route_summary``; the newest turn is kept as it is. Without an
+    ``ml_model`` the oldest words are dropped instead.
+    """
+
+    def __init__(self, database, ml_model=None, window=20, summary_tokens=150, max_sessions=64,
+                 flush_every=20, flush_interval=1.0, executor=None):
+        self.database = database
+        self.ml_model = ml_model
+        self.window = window
+        self.summary_tokens = summary_tokens
+        self.max_sessions = max_sessions
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.executor = executor
+        self._sessions = OrderedDict()
+        self._hydrating = {}
+        self._pending_turns = []
+        self._pending_summaries = {}
+        self._writer = BatchedWriter(self._take_pending, self._write_pending, self._restore_pending,
+                                     flush_every, flush_interval, logger)
+
+    async def session(self, session_id):
+        """Return the in-memory session, hydrating it from the database on first access."""
+        session = self._sessions.get(session_id)
+        if session is not None:
+            self._sessions.move_to_end(session_id)
+            return session
+        hydrating = self._hydrating.get(session_id)
+        if hydrating is None:
+            hydrating = self._hydrating[session_id] = asyncio.ensure_future(self._hydrate(session_id))
+        try:
+            session = await asyncio.shield(hydrating)
+        finally:
+            self._hydrating.pop(session_id, None)
+        self._sessions[session_id] = session
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)  # everything it holds is persisted or pending
+        return session
+
+    @traced('context.hydrate')
+    async def _hydrate(self, session_id):
+        session = Session(session_id, self.window)
+        db = await self.database.connect()
+        cursor = await db.execute(RECENT_CONTEXTS_SQL, (session_id, TURN_KEY, self.window))
+        rows = await cursor.fetchall()
+        await cursor.close()
+        session.turns.extend(Turn.from_json(value) for value, in reversed(rows))
+        cursor = await db.execute(RECENT_CONTEXTS_SQL, (session_id, SUMMARY_KEY, 1))
+        row = await cursor.fetchone()
+        await cursor.close()
+        session.summary = row[0] if row else ''
+        # Rows written since the last flush are not in the database yet
+        pending = [turn for pending_id, turn in self._pending_turns if pending_id == session_id]
+        session.turns.extend(pending)
+        session.summary = self._pending_summaries.get(session_id, session.summary)
+        logger.info(f"Hydrated session {session_id} with {len(session.turns)} turns.")
+        return session
+
+    async def recall(self, session_id, text):
+        """Return the analyzed turn for ``text`` if it was said within the window, else None."""
+        return (await self.session(session_id)).find(text)
+
+    async def recent_turns(self, session_id, count=None):
+        turns = list((await self.session(session_id)).turns)
+        return turns if count is None else turns[-count:]
+
+    async def rolling_summary(self, session_id):
+        return (await self.session(session_id)).summary
+
+    @traced('context.add_turn')
+    async def add_turn(self, session_id, text, entities=(), sentiment=None, summary=None):
+        """Record an analyzed turn, update the rolling summary and queue both for persistence."""
+        session = await self.session(session_id)
+        turn = Turn(text, entities, sentiment, summary)
+        async with session.lock:
+            session.turns.append(turn)
+            session.summary = await self._extend_summary(session.summary, summary or text)
+            self._pending_turns.append((session_id, turn))
+            self._pending_summaries[session_id] = session.summary
+        await self._writer.added(len(self._pending_turns))
+        return turn
+
+    async def _extend_summary(self, summary, addition):
+        if self.ml_model is None:
+            words = f"{summary} {addition}".split()
+            return ' '.join(words[-self.summary_tokens:])
+        # Tokenizing and condensing can parse and run models; keep them off the event loop
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._condense, summary, addition)
+
+    def _condense(self, summary, addition):
+        combined = f"{summary} {addition}".strip()
+        summary_tokens, addition_tokens = self.ml_model.count_tokens([summary, addition])
+        if summary_tokens + addition_tokens <= self.summary_tokens:
+            return combined
+        # The newest turn stays verbatim; only the older part is condensed
+        if addition_tokens < self.summary_tokens:
+            return f"{self.ml_model.route_summary(summary)} {addition}".strip() if summary else addition
+        return self.ml_model.route_summary(combined)
+
+    @traced('context.flush')
+    async def flush(self):
+        """Write all pending turns and the latest rolling summaries in one transaction."""
+        await self._writer.flush()
+
+    def _take_pending(self):
+        turns, self._pending_turns = self._pending_turns, []
+        summaries, self._pending_summaries = self._pending_summaries, {}
+        return (turns, summaries) if turns or summaries else None
+
+    def _restore_pending(self, pending):
+        turns, summaries = pending
+        self._pending_turns[:0] = turns
+        for session_id, summary in summaries.items():
+            self._pending_summaries.setdefault(session_id, summary)  # a summary made since is newer
+
+    async def _write_pending(self, pending):
+        turns, summaries = pending
+        rows = [(session_id, TURN_KEY, turn.to_json()) for session_id, turn in turns]
+        rows.extend((session_id, SUMMARY_KEY, summary) for session_id, summary in summaries.items())
+        try:
+            db = await self.database.connect()
+            # Only the latest rolling summary of a session is kept
+            await db.executemany(DELETE_CONTEXT_SQL, [(session_id, SUMMARY_KEY) for session_id in summaries])
+            await db.executemany(INSERT_CONTEXT_SQL, rows)
+            await db.commit()
+            logger.info(f"Saved {len(turns)} turns for {len(summaries)} sessions.")
+        except Exception as e:
+            logger.error(f"Error saving conversation context: {e}")
+            await self.database.rollback()
+            raise
+
+    async def close(self):
+        """Flush what is pending; call before closing the database."""
+        await self.flush()
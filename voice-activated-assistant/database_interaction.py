@@ -1,64 +1,240 @@
 import asyncio
 import aiosqlite
 import logging
+from collections import Counter
+from tracing import traced
+
+# Statements are kept as constants so sqlite's per-connection statement cache
+# reuses the compiled (prepared) statement on every call.
+UPDATE_FREQUENCY_SQL = '''
+    UPDATE Responses
+    SET frequency = frequency + ?, last_used = CURRENT_TIMESTAMP
+    WHERE response = ?
+'''
+
+# Many rows per session: one per persisted turn, plus rolling summary snapshots (see context_store.py)
+CONTEXTS_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS Contexts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        session_id TEXT NOT NULL,
+        context_key TEXT NOT NULL,
+        context_value TEXT NOT NULL,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_contexts_session_key ON Contexts (session_id, context_key);
+'''
+
+class BatchedWriter:
+    """Write-behind scheduling shared by ``ChatDatabase`` and ``ContextStore``.
+
+    The owner buffers its writes and calls ``added(count)`` with the number
+    now pending. ``flush()`` runs once ``flush_every`` are pending or
+    ``flush_interval`` seconds after the first, whichever comes first: it takes
+    the buffer with ``take()``, awaits ``write(pending)`` and then
+    ``after_write()``. If the write fails, ``restore(pending)`` merges the batch
+    back into the buffer so a transient error (e.g. "database is locked") loses
+    nothing; a timed flush logs the error and tries again an interval later.
+    The lock is created on first use, inside the running event loop.
+    """
+
+    def __init__(self, take, write, restore, flush_every, flush_interval, logger, after_write=None):
+        self.take = take
+        self.write = write
+        self.restore = restore
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.logger = logger
+        self.after_write = after_write
+        self._lock = None
+        self._handle = None
+
+    @property
+    def lock(self):
+        # Created lazily: before Python 3.10 a lock binds to the loop current at creation
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def added(self, count):
+        if count >= self.flush_every:
+            await self.flush()
+        else:
+            self.schedule()
+
+    def schedule(self):
+        if self._handle is None:
+            self._handle = asyncio.get_running_loop().call_later(self.flush_interval, self._flush_later)
+
+    def _flush_later(self):
+        self._handle = None
+        asyncio.ensure_future(self._flush_logged())
+
+    async def _flush_logged(self):
+        try:
+            await self.flush()
+        except Exception as e:
+            self.logger.error(f"Batched write failed; retrying in {self.flush_interval}s: {e}")
+            self.schedule()
+
+    async def flush(self):
+        """Write everything pending; returns whether there was anything to write."""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        async with self.lock:
+            pending = self.take()
+            if not pending:
+                return False
+            try:
+                await self.write(pending)
+            except Exception:
+                self.restore(pending)
+                raise
+        if self.after_write is not None:
+            await self.after_write()
+        return True
 
 class ChatDatabase:
-    def __init__(self, database_path):
+    """Async access to the chat memory database over one long-lived connection.
+
+    The connection runs in WAL mode with ``synchronous=NORMAL``. Frequency
+    updates are buffered and written as a single transaction once
+    ``flush_every`` updates are pending or ``flush_interval`` seconds after
+    the first one, whichever comes first; ``close()`` flushes what is left.
+    A batch whose write fails stays buffered for the next flush. Coroutine
+    functions in ``flush_listeners`` are awaited after each flush that wrote
+    something, e.g. to re-read the updated rows.
+    """
+
+    def __init__(self, database_path, flush_every=50, flush_interval=0.5):
         self.database_path = database_path
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._db = None
+        self._connect_lock = None
+        self._pending_frequencies = Counter()
+        self.flush_listeners = []
         self.logger = logging.getLogger(__name__)
+        self._writer = BatchedWriter(self._take_frequencies, self._write_frequencies, self._pending_frequencies.update,
+                                     flush_every, flush_interval, self.logger, after_write=self._notify_listeners)
         self.logger.setLevel(logging.INFO)
         formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
         stream_handler = logging.StreamHandler()
         stream_handler.setFormatter(formatter)
         self.logger.addHandler(stream_handler)
 
+    async def connect(self):
+        """Open the shared connection on first use and return it."""
+        if self._connect_lock is None:  # created in the running loop, see BatchedWriter.lock
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            if self._db is None:
+                db = await aiosqlite.connect(self.database_path, cached_statements=256)
+                await db.execute('PRAGMA journal_mode=WAL')
+                await db.execute('PRAGMA synchronous=NORMAL')
+                self._db = db
+            return self._db
+
+    @traced('db.init')
     async def init_db(self):
         try:
-            async with aiosqlite.connect(self.database_path) as db:
-                await db.executescript('''
-                    CREATE TABLE IF NOT EXISTS Responses (
-                        pattern TEXT NOT NULL,
-                        response TEXT NOT NULL,
-                        frequency INTEGER DEFAULT 1,
-                        last_used DATETIME DEFAULT CURRENT_TIMESTAMP,
-                        PRIMARY KEY (pattern, response)
-                    );
-                    CREATE TABLE IF NOT EXISTS Contexts (
-                        session_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        context_key TEXT NOT NULL,
-                        context_value TEXT NOT NULL,
-                        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                    );
-                ''')
-                await db.commit()
-                self.logger.info("Database initialized and tables created.")
+            db = await self.connect()
+            await self._migrate_contexts(db)
+            await db.executescript('''
+                CREATE TABLE IF NOT EXISTS Responses (
+                    pattern TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    frequency INTEGER DEFAULT 1,
+                    last_used DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (pattern, response)
+                );
+                CREATE INDEX IF NOT EXISTS idx_responses_response ON Responses (response);
+                CREATE INDEX IF NOT EXISTS idx_responses_rank ON Responses (frequency DESC, last_used DESC);
+                CREATE INDEX IF NOT EXISTS idx_responses_last_used ON Responses (last_used);
+            ''' + CONTEXTS_SCHEMA)
+            await db.commit()
+            self.logger.info("Database initialized and tables created.")
         except Exception as e:
             self.logger.error(f"Error initializing database: {e}")
             raise
 
+    async def _migrate_contexts(self, db):
+        # Contexts used to key rows by session_id alone, allowing one row per session
+        cursor = await db.execute('PRAGMA table_info(Contexts)')
+        columns = [row[1] for row in await cursor.fetchall()]
+        await cursor.close()
+        if not columns or 'id' in columns:
+            return
+        await db.executescript('''
+            ALTER TABLE Contexts RENAME TO Contexts_old;
+        ''' + CONTEXTS_SCHEMA + '''
+            INSERT INTO Contexts (session_id, context_key, context_value, timestamp)
+                SELECT session_id, context_key, context_value, timestamp FROM Contexts_old;
+            DROP TABLE Contexts_old;
+        ''')
+        self.logger.info("Migrated the Contexts table to one row per context entry.")
+
+    @traced('db.update_response_frequency')
     async def update_response_frequency(self, response):
+        """Record a use of ``response``; the write happens with the next batch flush."""
+        self._pending_frequencies[response] += 1
+        await self._writer.added(sum(self._pending_frequencies.values()))
+
+    @traced('db.flush')
+    async def flush(self):
+        """Write all buffered frequency updates in one transaction."""
+        await self._writer.flush()
+
+    def _take_frequencies(self):
+        pending = Counter(self._pending_frequencies)
+        self._pending_frequencies.clear()
+        return pending
+
+    async def _write_frequencies(self, pending):
         try:
-            async with aiosqlite.connect(self.database_path) as db:
-                await db.execute('''
-                    UPDATE Responses
-                    SET frequency = frequency + 1, last_used = CURRENT_TIMESTAMP
-                    WHERE response = ?
-                ''', (response,))
-                await db.commit()
-                self.logger.info(f"Updated frequency for response: {response}")
+            db = await self.connect()
+            await db.executemany(UPDATE_FREQUENCY_SQL, [(count, response) for response, count in pending.items()])
+            await db.commit()
+            self.logger.info(f"Updated frequency for {len(pending)} responses.")
         except Exception as e:
             self.logger.error(f"Error updating response frequency: {e}")
+            await self.rollback()
             raise
 
+    async def rollback(self):
+        """Roll back after a failed write, so retrying the batch cannot apply it twice."""
+        if self._db is None:
+            return
+        try:
+            await self._db.rollback()
+        except Exception as e:
+            self.logger.error(f"Error rolling back: {e}")
+
+    async def _notify_listeners(self):
+        for listener in list(self.flush_listeners):
+            try:
+                await listener()
+            except Exception as e:
+                self.logger.error(f"Error in flush listener {getattr(listener, '__qualname__', listener)}: {e}")
+
     async def close(self):
         try:
-            async with aiosqlite.connect(self.database_path) as db:
-                await db.close()
+            await self.flush()
+            if self._db is not None:
+                await self._db.close()
+                self._db = None
                 self.logger.info("Database connection closed successfully.")
         except Exception as e:
             self.logger.error(f"Error closing database connection: {e}")
             raise
 
+async def initialize_database(database_path):
+    """Create the schema and close the connection again, for one-off setup scripts."""
+    database = ChatDatabase(database_path)
+    try:
+        await database.init_db()
+    finally:
+        await database.close()
+
 if __name__ == "__main__":
-    database = ChatDatabase('chat_memory.db')
-    asyncio.run(database.init_db())
\ No newline at end of file
+    asyncio.run(initialize_database('chat_memory.db'))
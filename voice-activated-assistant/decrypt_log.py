@@ -0,0 +1,24 @@
+"""Print the records of an encrypted log file.
+
+Usage: ENCRYPTION_KEY=... python decrypt_log.py app.log [--backups]
+"""
+import argparse
+import os
+import sys
+from utilities import iter_encrypted_log
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('log_file')
+    parser.add_argument('--backups', action='store_true', help='also read rotated app.log.N files, oldest first')
+    args = parser.parse_args()
+    key = os.environ.get('ENCRYPTION_KEY')
+    if not key:
+        sys.exit("ENCRYPTION_KEY is not set.")
+    for record in iter_encrypted_log(args.log_file, key.encode(), include_backups=args.backups):
+        print(record)
+
+
+if __name__ == '__main__':
+    main()
@@ -28,14 +28,11 @@ pip install -r requirements.txt
 # Download and setup NLP models
 echo "Downloading and setting up SpaCy models..."
 python -m spacy download en_core_web_trf
-
-# Install NLTK data
-echo "Installing NLTK data..."
-python -m nltk.downloader punkt
+python -m spacy download en_core_web_sm  # used by the balanced and fast profiles
 
 # Ensure the database is initialized properly with error handling
 echo "Initializing the database..."
-if python -c 'import asyncio; from database_interaction import ChatDatabase; db = ChatDatabase("${DATABASE_PATH}"); asyncio.run(db.init_db())'; then
+if python -c 'import asyncio; from database_interaction import initialize_database; asyncio.run(initialize_database("${DATABASE_PATH}"))'; then
     echo "Database initialized successfully."
 else
     echo "Failed to initialize the database. Check the logs for details."
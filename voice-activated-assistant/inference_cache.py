@@ -0,0 +1,227 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text):
+    """Collapse whitespace so trivially different transcripts share a cache entry."""
+    return ' '.join(text.split())
+
+
+class InferenceCache:
+    """Bounded, content-keyed cache for model outputs.
+
+    Keys combine a hash of the normalized input text with the model name and
+    the generation parameters, so the same text summarized with different
+    lengths gets separate entries. Entries are evicted least-recently-used
+    once ``max_entries`` is reached and expire after ``ttl`` seconds. When
+    ``disk_path`` is given, entries are also written to a SQLite file that
+    survives restarts and is consulted on in-memory misses. The file is
+    pruned when opened and after every ``prune_every`` writes: expired rows
+    are deleted, then the oldest rows beyond ``max_disk_entries``.
+    """
+
+    def __init__(self, max_entries=1024, ttl=None, disk_path=None, max_disk_entries=10000, prune_every=256):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk_path = disk_path
+        self.max_disk_entries = max_disk_entries
+        self.prune_every = prune_every
+        self._writes_since_prune = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+        self._disk = None
+        if disk_path:
+            self._open_disk(disk_path)
+
+    def _open_disk(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._disk = sqlite3.connect(path, check_same_thread=False)
+        self._disk.execute('PRAGMA journal_mode=WAL')
+        self._disk.execute('''
+            CREATE TABLE IF NOT EXISTS InferenceCache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created REAL NOT NULL
+            )
+        ''')
+        self._disk.execute('CREATE INDEX IF NOT EXISTS idx_inference_cache_created ON InferenceCache (created)')
+        self._disk.commit()
+        with self._lock:
+            self._prune_disk()
+
+    def _prune_disk(self):
+        """Delete expired rows, then the oldest rows beyond ``max_disk_entries``; call with the lock held."""
+        self._writes_since_prune = 0
+        try:
+            if self.ttl is not None:
+                self._disk.execute('DELETE FROM InferenceCache WHERE created < ?', (time.time() - self.ttl,))
+            if self.max_disk_entries is not None:
+                self._disk.execute('''
+                    DELETE FROM InferenceCache WHERE key IN (
+                        SELECT key FROM InferenceCache ORDER BY created DESC LIMIT -1 OFFSET ?
+                    )
+                ''', (self.max_disk_entries,))
+            self._disk.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Error pruning inference cache: {e}")
+
+    @staticmethod
+    def make_key(model_name, text, **params):
+        payload = json.dumps([model_name, normalize_text(text), sorted(params.items())])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _expired(self, created):
+        return self.ttl is not None and time.time() - created > self.ttl
+
+    def get(self, key):
+        """Return ``(True, value)`` on a hit and ``(False, None)`` on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, created = entry
+                if not self._expired(created):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._entries[key]
+                self.evictions += 1
+            if self._disk is not None:
+                row = self._disk.execute('SELECT value, created FROM InferenceCache WHERE key = ?', (key,)).fetchone()
+                if row is not None:
+                    if not self._expired(row[1]):
+                        value = json.loads(row[0])
+                        self._store(key, value, row[1])
+                        self.hits += 1
+                        self.disk_hits += 1
+                        return True, value
+                    self._disk.execute('DELETE FROM InferenceCache WHERE key = ?', (key,))
+                    self._disk.commit()
+            self.misses += 1
+            return False, None
+
+    def set(self, key, value):
+        self.set_many([(key, value)])
+
+    def set_many(self, items):
+        """Store ``(key, value)`` pairs, writing them to the disk tier in one transaction."""
+        created = time.time()
+        with self._lock:
+            for key, value in items:
+                self._store(key, value, created)
+            if self._disk is not None and items:
+                try:
+                    self._disk.executemany('INSERT OR REPLACE INTO InferenceCache (key, value, created) VALUES (?, ?, ?)',
+                                           [(key, json.dumps(value), created) for key, value in items])
+                    self._disk.commit()
+                except sqlite3.Error as e:
+                    logger.error(f"Error writing inference cache entries: {e}")
+                self._writes_since_prune += len(items)
+                if self._writes_since_prune >= self.prune_every:
+                    self._prune_disk()
+
+    def _store(self, key, value, created):
+        self._entries[key] = (value, created)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_or_compute(self, model_name, text, compute, **params):
+        """Return the cached result for ``text`` or call ``compute(text)`` and cache it.
+
+        ``None`` results signal a failed inference and are not cached.
+        """
+        key = self.make_key(model_name, text, **params)
+        hit, value = self.get(key)
+        if hit:
+            return value
+        value = compute(text)
+        if value is not None:
+            self.set(key, value)
+        return value
+
+    def get_or_compute_many(self, model_name, texts, compute_many, **params):
+        """Batched ``get_or_compute``: only the misses are passed to ``compute_many(texts)``.
+
+        Texts that share a key (e.g. differ only in whitespace) are computed once.
+        """
+        keys = [self.make_key(model_name, text, **params) for text in texts]
+        results = [None] * len(texts)
+        pending = {}
+        for i, key in enumerate(keys):
+            if key in pending:
+                pending[key].append(i)
+                continue
+            hit, value = self.get(key)
+            if hit:
+                results[i] = value
+            else:
+                pending[key] = [i]
+        if pending:
+            computed = compute_many([texts[indices[0]] for indices in pending.values()])
+            for indices, value in zip(pending.values(), computed):
+                for i in indices:
+                    results[i] = value
+            self.set_many([(key, value) for key, value in zip(pending, computed) if value is not None])
+        return results
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._disk is not None:
+                self._disk.execute('DELETE FROM InferenceCache')
+                self._disk.commit()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'disk_hits': self.disk_hits,
+            'evictions': self.evictions,
+            'size': len(self._entries),
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+    def close(self):
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache():
+    """Return the process-wide inference cache.
+
+    ``INFERENCE_CACHE_SIZE``, ``INFERENCE_CACHE_TTL`` and ``INFERENCE_CACHE_PATH``
+    configure its size, time-to-live in seconds and optional on-disk tier, and
+    ``INFERENCE_CACHE_DISK_SIZE`` the number of rows the on-disk tier keeps.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            ttl = os.environ.get('INFERENCE_CACHE_TTL')
+            _default_cache = InferenceCache(
+                max_entries=int(os.environ.get('INFERENCE_CACHE_SIZE', 1024)),
+                ttl=float(ttl) if ttl else None,
+                disk_path=os.environ.get('INFERENCE_CACHE_PATH'),
+                max_disk_entries=int(os.environ.get('INFERENCE_CACHE_DISK_SIZE', 10000)),
+            )
+        return _default_cache
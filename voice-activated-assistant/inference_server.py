@@ -0,0 +1,280 @@
+"""Local inference server sharing one copy of the transformers models between assistant frontends.
+
+Usage: python inference_server.py [--host 127.0.0.1 --port 8765 | --unix-socket PATH]
+                                  [--workers 4] [--max-batch-size 16] [--max-wait-ms 10]
+
+The parent process loads the models once and then forks its worker
+processes, so on platforms with ``fork`` the workers share the weights
+copy-on-write instead of each loading their own. Requests from all clients
+are grouped into batches of up to ``max_batch_size`` texts, waiting at most
+``max_wait_ms`` for a batch to fill. The wire protocol is one JSON object per
+line in each direction.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from ML import MLModel
+from profiles import pin_threads
+
+logger = logging.getLogger(__name__)
+
+METHODS = ('analyze_sentiment', 'summarize_text')
+
+# Set in the parent before the workers are forked, so children inherit the loaded models
+_worker_model = None
+
+
+def _init_worker(threads_per_worker):
+    global _worker_model
+    # Pinned first, so the profile of a model loaded below cannot change it
+    pin_threads(threads_per_worker)
+    if _worker_model is None:
+        # Without fork (e.g. Windows) every worker has to load its own copy
+        _worker_model = _create_model()
+
+
+def _create_model():
+    from utilities import CustomLogger
+    model = MLModel(CustomLogger('inference_server.log'))
+    model.init_transformers_models()
+    return model
+
+
+def _run_batch(method, texts, params):
+    if method == 'analyze_sentiment':
+        return _worker_model.analyze_sentiment_batch(texts)
+    return _worker_model.summarize_batch(texts, **params)
+
+
+def _noop(_):
+    return os.getpid()
+
+
+class InferenceServer:
+    """Batches requests from many clients and runs them on a pool of forked worker processes."""
+
+    def __init__(self, workers=2, max_batch_size=16, max_wait=0.01, threads_per_worker=1):
+        self.workers = workers
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.threads_per_worker = threads_per_worker
+        self.pool = None
+        self._batches = {}
+
+    def start_pool(self):
+        global _worker_model
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('fork' if 'fork' in methods else 'spawn')
+        if context.get_start_method() == 'fork':
+            _worker_model = _create_model()
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context,
+                                        initializer=_init_worker, initargs=(self.threads_per_worker,))
+        # Start every worker now, while the parent's memory is still mostly untouched pages
+        pids = set(self.pool.map(_noop, range(self.workers * 4)))
+        logger.info(f"Started {len(pids)} inference workers ({context.get_start_method()}).")
+
+    async def submit(self, method, text, params):
+        """Queue one text for ``method`` and wait for its result from the batch it lands in."""
+        loop = asyncio.get_running_loop()
+        key = (method, json.dumps(params, sort_keys=True))
+        batch = self._batches.get(key)
+        if batch is None:
+            batch = self._batches[key] = []
+            loop.call_later(self.max_wait, self._flush, key, batch)
+        future = loop.create_future()
+        batch.append((text, future))
+        if len(batch) >= self.max_batch_size:
+            self._flush(key, batch)
+        return await future
+
+    def _flush(self, key, batch):
+        if self._batches.get(key) is not batch:
+            return  # already flushed because it filled up
+        del self._batches[key]
+        asyncio.ensure_future(self._run(key, batch))
+
+    async def _run(self, key, batch):
+        method, params = key[0], json.loads(key[1])
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(self.pool, _run_batch, method, [text for text, _ in batch], params)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def handle_client(self, reader, writer):
+        pending = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                task = asyncio.ensure_future(self._answer(json.loads(line), writer))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+        except (ConnectionError, json.JSONDecodeError) as e:
+            logger.warning(f"Dropping inference client: {e}")
+        finally:
+            # A client may stop sending before its answers are ready; send them before closing
+            await asyncio.gather(*pending, return_exceptions=True)
+            writer.close()
+
+    async def _answer(self, request, writer):
+        response = {'id': request.get('id')}
+        try:
+            if request.get('method') not in METHODS:
+                raise ValueError(f"Unknown method {request.get('method')!r}")
+            response['result'] = await self.submit(request['method'], request['text'], request.get('params', {}))
+        except Exception as e:
+            response['error'] = str(e)
+        if not writer.is_closing():
+            writer.write(json.dumps(response).encode('utf-8') + b'\n')
+            await writer.drain()
+
+    async def serve(self, host='127.0.0.1', port=8765, unix_socket=None):
+        if self.pool is None:
+            self.start_pool()
+        if unix_socket:
+            server = await asyncio.start_unix_server(self.handle_client, path=unix_socket)
+        else:
+            server = await asyncio.start_server(self.handle_client, host, port)
+        logger.info(f"Inference server listening on {unix_socket or f'{host}:{port}'}")
+        async with server:
+            await server.serve_forever()
+
+
+class InferenceClient:
+    """Blocking client with ``MLModel``'s ``analyze_sentiment``/``summarize_text`` signatures.
+
+    ``address`` is ``"host:port"`` or a Unix socket path. One connection is
+    shared by all threads; requests are serialized on it.
+    """
+
+    def __init__(self, address, timeout=60):
+        self.address = address
+        self.timeout = timeout
+        self._socket = None
+        self._file = None
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+
+    def _connect(self):
+        if ':' in self.address and not os.path.exists(self.address):
+            host, port = self.address.rsplit(':', 1)
+            self._socket = socket.create_connection((host, int(port)), timeout=self.timeout)
+        else:
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.settimeout(self.timeout)
+            self._socket.connect(self.address)
+        self._file = self._socket.makefile('rwb')
+
+    def _call_many(self, method, texts, params):
+        with self._lock:
+            try:
+                if self._socket is None:
+                    self._connect()
+                ids = []
+                for text in texts:
+                    request_id = next(self._ids)
+                    ids.append(request_id)
+                    self._file.write(json.dumps({'id': request_id, 'method': method, 'text': text, 'params': params}).encode('utf-8') + b'\n')
+                self._file.flush()
+                # Send the whole list before reading so the server can batch it; answers may come back in any order
+                answers = {}
+                while len(answers) < len(ids):
+                    line = self._file.readline()
+                    if not line:
+                        raise ConnectionError("Inference server closed the connection.")
+                    answer = json.loads(line)
+                    answers[answer['id']] = answer
+            except BaseException:
+                # After a timeout or a garbled line the stream is out of step; the next call reconnects
+                self.close()
+                raise
+        results = []
+        for request_id in ids:
+            answer = answers[request_id]
+            if 'error' in answer:
+                raise RuntimeError(answer['error'])
+            results.append(answer['result'])
+        return results
+
+    def analyze_sentiment(self, text):
+        return self.analyze_sentiment_batch([text])[0]
+
+    def summarize_text(self, text):
+        return self.summarize_batch([text])[0]
+
+    def analyze_sentiment_batch(self, texts):
+        return self._call_many('analyze_sentiment', list(texts), {})
+
+    def summarize_batch(self, texts, max_length=130, min_length=30):
+        return self._call_many('summarize_text', list(texts), {'max_length': max_length, 'min_length': min_length})
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+
+class RemoteMLModel(MLModel):
+    """``MLModel`` whose sentiment and summarization run on an inference server.
+
+    spaCy parsing, result caching and entity grouping stay in-process.
+    """
+
+    def __init__(self, logger, address, **kwargs):
+        super().__init__(logger, **kwargs)
+        self.client = InferenceClient(address)
+
+    def init_transformers_models(self):
+        return None
+
+    def _analyze_sentiment_uncached(self, texts, batch_size=None):
+        try:
+            return self.client.analyze_sentiment_batch(texts)
+        except Exception as e:
+            self.logger.log_error(f"Error in remote sentiment analysis: {e}")
+            return [None] * len(texts)
+
+    def _summarize_uncached(self, texts, batch_size, max_length, min_length):
+        try:
+            return self.client.summarize_batch(texts, max_length=max_length, min_length=min_length)
+        except Exception as e:
+            self.logger.log_error(f"Error in remote text summarization: {e}")
+            return [None] * len(texts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix-socket')
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument('--threads-per-worker', type=int, default=1)
+    parser.add_argument('--max-batch-size', type=int, default=16)
+    parser.add_argument('--max-wait-ms', type=float, default=10)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    server = InferenceServer(workers=args.workers, max_batch_size=args.max_batch_size,
+                             max_wait=args.max_wait_ms / 1000, threads_per_worker=args.threads_per_worker)
+    asyncio.run(server.serve(args.host, args.port, args.unix_socket))
+
+
+if __name__ == '__main__':
+    main()
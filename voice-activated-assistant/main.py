@@ -1,22 +1,45 @@
+from startup import StartupProfiler, ModelWarmup, ensure_spacy_models
+
+# Created first so every later phase is timed from process start
+profiler = StartupProfiler()
+
 import os
-import spacy
-import subprocess
-import sys
 import asyncio
-from kivy.app import App
-from kivy.uix.label import Label
-from kivy.uix.button import Button
-from kivy.uix.boxlayout import BoxLayout
-from cryptography.fernet import Fernet
-from database_interaction import ChatDatabase
-from ML import MLModel
-from speech_recognition import recognizer, microphone
-from utilities import CustomLogger, EncryptedFileHandler
-from nlp_processing import listen_and_respond, analyze_text
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+# Each import is timed on its own; modules it shares with an earlier one are counted there
+with profiler.phase('import kivy.app'):
+    from kivy.app import App
+with profiler.phase('import kivy.clock'):
+    from kivy.clock import Clock
+with profiler.phase('import kivy.core.window'):
+    from kivy.core.window import Window
+with profiler.phase('import kivy widgets'):
+    from kivy.uix.label import Label
+    from kivy.uix.button import Button
+    from kivy.uix.boxlayout import BoxLayout
+with profiler.phase('import database_interaction'):
+    from database_interaction import ChatDatabase
+with profiler.phase('import context_store'):
+    from context_store import ContextStore
+with profiler.phase('import response_store'):
+    from response_store import ResponseStore
+with profiler.phase('import ML'):
+    from ML import create_ml_model
+with profiler.phase('import model_registry'):
+    from model_registry import get_registry
+with profiler.phase('import inference_cache'):
+    from inference_cache import get_default_cache
+with profiler.phase('import tracing'):
+    from tracing import get_tracer, serve_from_env, span
+with profiler.phase('import utilities'):
+    from utilities import CustomLogger
 
 # Constants
 LOG_FILE = 'app.log'
 DATABASE_FILE = 'chat_memory.db'
+INFERENCE_WORKERS = int(os.environ.get('INFERENCE_WORKERS', 2))
+SESSION_ID = os.environ.get('ASSISTANT_SESSION', 'default')
 
 # Function to retrieve the encryption key from environment variable
 def retrieve_encryption_key():
@@ -26,36 +49,57 @@ def retrieve_encryption_key():
         raise KeyError("Encryption key not found in environment variables.")
     return key
 
-# Function to check and download necessary spaCy models
-def ensure_spacy_models(*models):
-    for model in models:
-        try:
-            spacy.load(model)  # Try to load the model
-            print(f"Model {model} is already installed.")
-        except OSError:
-            print(f"Model {model} not found. Installing...")
-            # Install the model using subprocess to ensure compatibility with the environment
-            subprocess.check_call([sys.executable, "-m", "spacy", "download", model])
-
 # Initialize the logger with encryption
 encryption_key = retrieve_encryption_key()
-logger = CustomLogger(LOG_FILE, encryption_key=encryption_key)
+logger = CustomLogger(LOG_FILE, encryption_key=encryption_key, async_writes=True)  # Encrypts on a background thread
 
-# Initialize the ML model and ensure necessary models are downloaded
-ml_model = MLModel(logger)
-ensure_spacy_models('en_core_web_trf', 'en_core_web_sm')  # Add any other models you use
+# The ML model resolves its models lazily; they are warmed up in the background after the window appears
+ml_model = create_ml_model(logger)
 
 # Initialize the database connection
 db = ChatDatabase(DATABASE_FILE)
 
+# Recent turns and a rolling summary of the conversation, persisted to the Contexts table
+contexts = ContextStore(db, ml_model)
+
+# Pattern-matched responses, loaded from the Responses table once the database is ready
+responses = ResponseStore()
+
+# Speech module (microphone, TTS, recognizer); imported by the warmup thread
+nlp_processing = None
+
+def import_speech_modules():
+    # A plain import statement (not importlib) so PyInstaller still bundles the module
+    global nlp_processing
+    with profiler.phase('import nlp_processing'):
+        import nlp_processing
+
 class VoiceAssistantApp(App):
+    """Kivy front end, driven by ``async_run`` on the asyncio event loop.
+
+    The event loop thread is also the UI thread, so nothing blocking runs on
+    it. Microphone capture and recognition run on a dedicated capture thread,
+    analysis on a bounded inference pool, and widget updates are posted back
+    through ``Clock``. Button presses feed a queue of at most one pending
+    turn: a press while a turn is running queues the next turn, and further
+    presses are ignored until it starts.
+    """
+
     def build(self):
-        # Ensure the database is initialized asynchronously
-        asyncio.create_task(self.init_db_async())
+        self._tasks = set()
+        self._turns = asyncio.Queue(maxsize=1)
+        self.capture_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='capture')
+        self.inference_executor = ThreadPoolExecutor(max_workers=INFERENCE_WORKERS, thread_name_prefix='inference')
+        contexts.executor = self.inference_executor
+        serve_from_env()  # Prometheus-text stage metrics on TRACE_PORT when TRACING is on
+
+        # Ensure the database is initialized asynchronously; anything that reads it awaits this task first
+        self.db_ready = self.start_task(self.init_db_async())
+        self.start_task(self.run_turns())
 
         # Setup UI components
-        self.label = Label(text='Speak into your microphone and the assistant will respond.')
-        self.button = Button(text='Start Listening', on_press=self.listen)
+        self.label = Label(text='Loading speech and language models...')
+        self.button = Button(text='Start Listening', on_press=self.listen, disabled=True)
         self.response_label = Label(text='Response will appear here...')
 
         # Layout
@@ -64,33 +108,143 @@ class VoiceAssistantApp(App):
         layout.add_widget(self.button)
         layout.add_widget(self.response_label)
 
+        profiler.mark('ui built')
         return layout
 
+    def on_start(self):
+        Window.bind(on_flip=self._on_first_frame)
+        self.warmup = ModelWarmup([
+            ('speech modules', import_speech_modules),
+            ('check spaCy models', lambda: ensure_spacy_models(ml_model.profile.spacy_model)),
+            ('spaCy pipeline', lambda: ml_model.nlp),
+            ('transformers pipelines', ml_model.init_transformers_models),
+        ], on_progress=self._on_warmup_progress, on_error=self._on_warmup_error, profiler=profiler)
+        self.warmup.start()
+
+    def _on_first_frame(self, *args):
+        Window.unbind(on_flip=self._on_first_frame)
+        profiler.mark('first frame')
+
+    def _on_warmup_progress(self, label, done, total):
+        # Called on the warmup thread; widgets may only be touched from the Kivy thread
+        Clock.schedule_once(lambda dt: self._show_progress(label, done, total))
+
+    def _show_progress(self, label, done, total):
+        if label is not None:
+            self.label.text = f'Loading {label} ({done + 1}/{total})...'
+            return
+        self.label.text = 'Speak into your microphone and the assistant will respond.'
+        self.button.disabled = False
+        profiler.mark('interactive')
+        logger.log_info(f"Startup profile:\n{profiler.report()}")
+        self.start_task(self.load_responses_async())
+
+    def _on_warmup_error(self, label, error):
+        self.post(lambda: setattr(self.label, 'text', f'Failed to load {label}: {error}'))
+
+    def post(self, update):
+        """Run ``update()`` on the UI thread at the next frame."""
+        Clock.schedule_once(lambda dt: update())
+
+    def start_task(self, coroutine):
+        """Start a task that is cancelled when the app shuts down."""
+        task = asyncio.get_running_loop().create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
     async def init_db_async(self):
         try:
             await db.init_db()
         except Exception as e:
             logger.log_error(f"Error initializing database: {e}")
 
+    async def load_responses_async(self):
+        # Warmup can finish before the tables exist
+        await self.db_ready
+        try:
+            await responses.load(db)
+        except Exception as e:
+            logger.log_error(f"Error loading stored responses: {e}")
+
+    async def run_turns(self):
+        # Single consumer, so turns never overlap
+        while True:
+            await self._turns.get()
+            try:
+                await self.process_audio()
+            except Exception as e:
+                logger.log_error(f"Error processing audio: {e}")
+                self.post(lambda: setattr(self.response_label, 'text', 'An error occurred. Please try again.'))
+
+    def run_in(self, executor, func, *args):
+        # Copy the context so spans opened in the worker thread join the current turn's trace
+        return asyncio.get_running_loop().run_in_executor(executor, contextvars.copy_context().run, func, *args)
+
     async def process_audio(self):
-        # Capture and process speech using the integrated NLP processing function
-        text = listen_and_respond()
-        if text:
-            # Analysis and response generation based on the text processed
-            analysis_results = analyze_text(text)
+        with span('turn'):
+            self.post(lambda: setattr(self.label, 'text', 'Listening...'))
+            try:
+                text = await self.run_in(self.capture_executor, nlp_processing.recognize_speech)
+            except (nlp_processing.sr.UnknownValueError, EOFError):
+                self.post(lambda: setattr(self.label, 'text', "Sorry, I didn't catch that. Press to try again."))
+                return
+            self.post(lambda: setattr(self.label, 'text', f'Heard: {text}'))
+
+            # Analysis and response generation based on the text processed; a repeat of a recent turn reuses its analysis
+            previous = await contexts.recall(SESSION_ID, text)
+            if previous is not None:
+                analysis_results = previous.analysis()
+            else:
+                analysis_results = await self.run_in(self.inference_executor, nlp_processing.analyze_text, text)
             entities, sentiment, summary = analysis_results
+            await contexts.add_turn(SESSION_ID, text, entities, sentiment, summary)
+            stored = responses.get_best_response(text)
+            nlp_processing.tts.say(stored or nlp_processing.generate_response_based_on_analysis(analysis_results))
+            if stored:
+                await responses.record_use(stored)
             logger.log_info(f"Processed interaction: Text: '{text}', Entities: {entities}, Sentiment: {sentiment}, Summary: {summary}")
-            await db.update_response_frequency(summary)
+            if summary:
+                await db.update_response_frequency(summary)
             response = f"Entities: {entities}\nSentiment: {sentiment}\nSummary: {summary}"
-            self.response_label.text = response
+            self.post(lambda: setattr(self.response_label, 'text', response))
 
     def listen(self, instance):
-        # Start listening to the microphone and process audio
-        asyncio.create_task(self.process_audio())
+        # Queue a turn; if one is already waiting, this press is a duplicate
+        try:
+            self._turns.put_nowait(True)
+        except asyncio.QueueFull:
+            pass
 
     def on_stop(self):
+        logger.log_info(f"Model registry:\n{get_registry().report()}")
+        logger.log_info(f"Inference cache: {get_default_cache().stats()}")
+        logger.log_info(f"Summary routing: {ml_model.router.metrics()}")
+        if get_tracer().enabled:
+            logger.log_info(f"Stage latencies:\n{get_tracer().report()}")
+
+    async def shutdown(self):
+        """Cancel running tasks, then close the database and the log."""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        # A capture blocked in listen() ends after its current chunk and releases the microphone
+        if nlp_processing is not None:
+            nlp_processing.capture_session.stop()
+        self.capture_executor.shutdown(wait=False, cancel_futures=True)
+        self.inference_executor.shutdown(wait=False, cancel_futures=True)
         # Cleanly close the database connection when the application is closed
-        asyncio.run(db.close())
+        await contexts.close()
+        await db.close()
+        get_tracer().close()
+        logger.close()
+
+async def main():
+    app = VoiceAssistantApp()
+    try:
+        await app.async_run(async_lib='asyncio')
+    finally:
+        await app.shutdown()
 
 if __name__ == '__main__':
-    VoiceAssistantApp().run()
\ No newline at end of file
+    asyncio.run(main())
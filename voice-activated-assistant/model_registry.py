@@ -0,0 +1,137 @@
+import logging
+import os
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def current_rss():
+    """Return the resident set size of this process in bytes, or None if unavailable.
+
+    Uses psutil (a requirement, and the only source on Windows), else Linux's
+    ``/proc``. ``getrusage`` is no fallback: it reports the peak, which would
+    make load-time differences meaningless.
+    """
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def peak_rss():
+    """Return the peak resident set size of this process in bytes, or None if unavailable."""
+    try:
+        import psutil
+        peak = getattr(psutil.Process().memory_info(), 'peak_wset', None)  # Only reported on Windows
+        if peak is not None:
+            return peak
+    except ImportError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024  # bytes on macOS, KiB elsewhere
+
+
+class ModelRegistry:
+    """Process-wide cache of spaCy and transformers models.
+
+    Every model is loaded at most once, on first use, and the same instance is
+    handed to every caller. Load time and the resident memory growth observed
+    while loading are recorded per model and exposed through ``stats()``.
+    """
+
+    def __init__(self):
+        self._models = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def _get_or_load(self, key, loader):
+        model = self._models.get(key)
+        if model is not None:
+            return model
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            model = self._models.get(key)
+            if model is not None:
+                return model
+            rss_before = current_rss()
+            start = time.perf_counter()
+            model = loader()
+            load_seconds = time.perf_counter() - start
+            rss_after = current_rss()
+            rss_delta = rss_after - rss_before if rss_before is not None and rss_after is not None else None
+            self._stats[key] = {'load_seconds': load_seconds, 'rss_delta_bytes': rss_delta, 'rss_after_bytes': rss_after}
+            self._models[key] = model
+            logger.info(f"Loaded {key[0]} model {key[1]} in {load_seconds:.2f}s"
+                        + (f" (+{rss_delta / 2**20:.1f} MiB RSS)" if rss_delta is not None else ""))
+            return model
+
+    def spacy(self, model_name):
+        """Return the shared spaCy pipeline ``model_name``, loading it on first use."""
+        def load():
+            import spacy
+            return spacy.load(model_name)
+        return self._get_or_load(('spacy', model_name), load)
+
+    def pipeline(self, task, model_name, quantize=False):
+        """Return the shared transformers pipeline for ``task`` backed by ``model_name``.
+
+        With ``quantize`` the model's Linear layers are dynamically quantized to
+        int8; quantized and full-precision copies are cached separately.
+        """
+        def load():
+            from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification, AutoModelForSeq2SeqLM
+            model_class = AutoModelForSeq2SeqLM if task == 'summarization' else AutoModelForSequenceClassification
+            tokenizer = AutoTokenizer.from_pretrained(model_name)
+            model = model_class.from_pretrained(model_name)
+            if quantize:
+                from profiles import quantize_dynamic
+                model = quantize_dynamic(model)
+            return pipeline(task, model=model, tokenizer=tokenizer)
+        return self._get_or_load((task, f"{model_name}:int8" if quantize else model_name), load)
+
+    def tokenizer(self, model_name):
+        """Return the shared tokenizer of ``model_name`` without loading the model weights."""
+        def load():
+            from transformers import AutoTokenizer
+            return AutoTokenizer.from_pretrained(model_name)
+        return self._get_or_load(('tokenizer', model_name), load)
+
+    def is_loaded(self, kind, model_name):
+        return (kind, model_name) in self._models
+
+    def stats(self):
+        """Return ``{"kind:model_name": {...}}`` with load time and RSS growth per loaded model."""
+        return {f"{kind}:{name}": dict(stats) for (kind, name), stats in self._stats.items()}
+
+    def report(self):
+        lines = []
+        for name, stats in self.stats().items():
+            rss = stats['rss_delta_bytes']
+            rss_text = f"{rss / 2**20:.1f} MiB" if rss is not None else "n/a"
+            lines.append(f"{name}: {stats['load_seconds']:.2f}s, {rss_text}")
+        peak = current_rss()
+        if peak is not None:
+            lines.append(f"process RSS: {peak / 2**20:.1f} MiB")
+        return '\n'.join(lines)
+
+
+registry = ModelRegistry()
+
+
+def get_registry():
+    """Return the process-wide model registry."""
+    return registry
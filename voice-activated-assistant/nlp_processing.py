@@ -1,42 +1,44 @@
-import spacy
-import nltk
-from nltk.tokenize import word_tokenize
 import speech_recognition as sr
-import pyttsx3
-from ML import MLModel  # Importing the MLModel from ML.py
+from ML import create_ml_model  # Local MLModel, or a client of the inference server
+from analysis_context import as_context
 import logging
+import asyncio
+import sys
+from recognition_backends import build_recognizer
+from tts_worker import get_tts_worker
+from tracing import span, traced
+from streaming_pipeline import SpeechPipeline, MicrophoneSource, WavFileSource, AudioCaptureSession
 
 # Initialize the logger
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Load spaCy model and NLTK resources safely
-try:
-    nlp = spacy.load('en_core_web_trf')
-    nltk.download('punkt')
-except Exception as e:
-    logger.error(f"Failed to load NLP libraries: {e}")
-    raise SystemExit(e)  # Exit if NLP libraries cannot be loaded
+# spaCy and transformers models come from the shared registry on first use
 
 # Initialize the text-to-speech and speech recognition
 try:
-    engine = pyttsx3.init()
+    tts = get_tts_worker()  # One worker per process, shared by every module; tts.say() returns immediately
     recognizer = sr.Recognizer()
+    recognition = build_recognizer(recognizer)  # Backend order from RECOGNIZER_BACKENDS
     microphone = sr.Microphone()
+    capture_session = AudioCaptureSession(MicrophoneSource(microphone))
+    capture_session.segmenter.on_speech_start = tts.interrupt  # Barge-in: new speech stops the current reply
+    capture_session.segmenter.playback = tts.is_speaking  # so the reply's own echo does not barge in
 except Exception as e:
     logger.error(f"Failed to initialize speech engines: {e}")
     raise SystemExit(e)
 
-# Create an instance of MLModel
-ml_model = MLModel(logger)
+# Create an instance of MLModel; it shares its models with every other instance
+ml_model = create_ml_model(logger)
 
+@traced('analyze_text')
 def analyze_text(text):
     """Enhanced NLP processing with machine learning integration."""
     try:
-        doc = nlp(text)
-        entities = [(ent.text, ent.label_) for ent in doc.ents]
-        sentiment = ml_model.analyze_sentiment(text)  # Analyze sentiment using ML
-        summary = ml_model.summarize_text(text)  # Summarize text using ML
+        context = as_context(text, ml_model)  # Parse once, share the Doc across analyses
+        entities = context.entities
+        sentiment = context.sentiment  # Analyze sentiment using ML
+        summary = context.summary  # Summarize text using ML
         
         logger.info(f'Entities: {entities}, Sentiment: {sentiment}, Summary: {summary}')
         return entities, sentiment, summary
@@ -44,30 +46,39 @@ def analyze_text(text):
         logger.error(f"Error in text analysis: {e}")
         return [], None, None
 
+def recognize_speech():
+    """Block until the next utterance and return its transcript.
+
+    Raises ``sr.UnknownValueError`` or ``sr.RequestError`` like the recognizers,
+    and ``EOFError`` when the audio source has ended.
+    """
+    logger.info("Listening for speech...")
+    # The capture session keeps the microphone open and calibrated across turns
+    with span('capture'):
+        audio = capture_session.listen()
+    if audio is None:
+        raise EOFError("Audio source ended.")
+    text = recognition.transcribe(audio)
+    logger.info(f"Recognized text: {text}")
+    return text
+
 def listen_and_respond():
-    """Handles speech recognition and response generation."""
-    with microphone as source:
-        recognizer.adjust_for_ambient_noise(source)
-        logger.info("Listening for speech...")
-        try:
-            audio = recognizer.listen(source)
-            text = recognizer.recognize_google(audio)
-            logger.info(f"Recognized text: {text}")
+    """Handles speech recognition and response generation; returns the recognized text or None."""
+    try:
+        with span('turn'):
+            text = recognize_speech()
             analysis_results = analyze_text(text)
             response = generate_response_based_on_analysis(analysis_results)
-            engine.say(response)
-            engine.runAndWait()
-        except sr.UnknownValueError:
-            engine.say("Sorry, I didn't catch that. Could you repeat?")
-            engine.runAndWait()
-        except sr.RequestError as e:
-            logger.error(f"Speech service error: {e}")
-            engine.say("There was an error with the speech service.")
-            engine.runAndWait()
-        except Exception as e:
-            logger.error(f"General error in speech recognition: {e}")
-            engine.say("An error occurred. Please try again.")
-            engine.runAndWait()
+            tts.say(response)
+        return text
+    except sr.UnknownValueError:
+        tts.say("Sorry, I didn't catch that. Could you repeat?")
+    except sr.RequestError as e:
+        logger.error(f"Speech service error: {e}")
+        tts.say("There was an error with the speech service.")
+    except Exception as e:
+        logger.error(f"General error in speech recognition: {e}")
+        tts.say("An error occurred. Please try again.")
 
 def generate_response_based_on_analysis(analysis_results):
     """Generate intelligent responses based on the analysis."""
@@ -77,12 +88,31 @@ def generate_response_based_on_analysis(analysis_results):
     else:
         return "I'm here to help. Tell me more."
 
+def respond_to_text(text):
+    """Analyze recognized text and return the spoken reply."""
+    logger.info(f"Recognized text: {text}")
+    return generate_response_based_on_analysis(analyze_text(text))
+
+def run_streaming(source=None):
+    """Run the assistant as a streaming pipeline of concurrent capture, recognition, analysis and speech stages.
+
+    ``source`` defaults to the microphone; pass a ``WavFileSource`` to replay a recording.
+    """
+    if source is None:
+        session = capture_session
+    else:
+        session = AudioCaptureSession(source)
+        session.segmenter.on_speech_start = tts.interrupt
+        session.segmenter.playback = tts.is_speaking
+    pipeline = SpeechPipeline(session, recognition.transcribe, respond_to_text, tts.say, segmenter=session.segmenter)
+    with session:
+        asyncio.run(pipeline.run())
+
 # Main loop to handle interactions
 if __name__ == "__main__":
     logger.info("Starting the voice assistant...")
     try:
-        while True:
-            listen_and_respond()
+        run_streaming(WavFileSource(sys.argv[1]) if len(sys.argv) > 1 else None)
     except KeyboardInterrupt:
         logger.info("Voice assistant terminated by user.")
-        engine.stop()
\ No newline at end of file
+        tts.stop()
\ No newline at end of file
@@ -0,0 +1,83 @@
+import logging
+import os
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+ModelProfile = namedtuple('ModelProfile', [
+    'name',
+    'spacy_model',
+    'sentiment_model',
+    'summarization_model',
+    'quantize',     # dynamic int8 quantization of the transformers' Linear layers
+    'num_threads',  # torch intra-op threads; None leaves torch's default
+])
+
+
+def physical_cores():
+    """Number of physical CPU cores; hyperthreads only slow down torch's matrix kernels."""
+    try:
+        import psutil
+        cores = psutil.cpu_count(logical=False)
+    except ImportError:
+        cores = None
+    return cores or os.cpu_count() or 1
+
+
+PROFILES = {
+    'accurate': ModelProfile('accurate', 'en_core_web_trf', 'distilbert-base-uncased-finetuned-sst-2-english',
+                             'facebook/bart-large-cnn', quantize=False, num_threads=None),
+    'balanced': ModelProfile('balanced', 'en_core_web_sm', 'distilbert-base-uncased-finetuned-sst-2-english',
+                             'sshleifer/distilbart-cnn-12-6', quantize=False, num_threads=physical_cores()),
+    'fast': ModelProfile('fast', 'en_core_web_sm', 'distilbert-base-uncased-finetuned-sst-2-english',
+                         'sshleifer/distilbart-cnn-6-6', quantize=True, num_threads=physical_cores()),
+}
+
+DEFAULT_PROFILE = 'accurate'
+
+_applied_threads = None
+
+
+def get_profile(profile=None):
+    """Resolve a profile by name (or pass one through), defaulting to ``ASSISTANT_PROFILE``.
+
+    ``ASSISTANT_THREADS`` overrides the thread count of a profile resolved by name.
+    """
+    if isinstance(profile, ModelProfile):
+        return profile
+    name = profile or os.environ.get('ASSISTANT_PROFILE', DEFAULT_PROFILE)
+    try:
+        resolved = PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown performance profile {name!r}; choose from {', '.join(PROFILES)}")
+    threads = os.environ.get('ASSISTANT_THREADS')
+    return resolved._replace(num_threads=int(threads)) if threads else resolved
+
+
+def apply_thread_settings(profile):
+    """Set torch's thread count for ``profile``; it is process-wide, so only the first setting sticks."""
+    if profile.num_threads is None or _applied_threads is not None:
+        return
+    if pin_threads(profile.num_threads):
+        logger.info(f"Using {profile.num_threads} torch threads for profile {profile.name}")
+
+
+def pin_threads(count):
+    """Set torch's thread count, overriding any earlier setting; later profile settings are then ignored.
+
+    For processes whose thread budget is decided by their host, such as inference server workers.
+    """
+    global _applied_threads
+    try:
+        import torch
+    except ImportError:
+        return False
+    torch.set_num_threads(count)
+    _applied_threads = count
+    return True
+
+
+def quantize_dynamic(model):
+    """Dynamically quantize a model's Linear layers to int8 for faster CPU inference."""
+    import torch
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
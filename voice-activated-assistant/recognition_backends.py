@@ -0,0 +1,225 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+import speech_recognition as sr
+from tracing import span
+from utilities import percentile
+
+logger = logging.getLogger(__name__)
+
+
+class RecognizerBackend:
+    """Base class for speech-to-text engines.
+
+    Subclasses implement ``_transcribe(audio)``, returning text or raising
+    ``sr.UnknownValueError`` when nothing was understood and ``sr.RequestError``
+    when the engine itself is unavailable; a missing engine package
+    (``ImportError``) or model file (``OSError``) is turned into
+    ``sr.RequestError`` by ``transcribe``, which also wraps it with
+    per-utterance latency and real-time-factor (processing time divided by audio
+    duration) bookkeeping over the last ``history`` utterances.
+    """
+
+    name = 'base'
+
+    def __init__(self, history=1000):
+        self.latencies = deque(maxlen=history)
+        self.real_time_factors = deque(maxlen=history)
+        self.audio_seconds = 0.0
+        self.failures = 0
+
+    def transcribe(self, audio):
+        duration = len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
+        start = time.perf_counter()
+        try:
+            with span(f'recognize.{self.name}', audio_seconds=duration):
+                try:
+                    return self._transcribe(audio)
+                except (ImportError, OSError) as e:
+                    raise sr.RequestError(f"{self.name} recognizer is unavailable: {e}") from e
+        except (sr.UnknownValueError, sr.RequestError):
+            self.failures += 1
+            raise
+        finally:
+            latency = time.perf_counter() - start
+            self.latencies.append(latency)
+            self.audio_seconds += duration
+            if duration:
+                self.real_time_factors.append(latency / duration)
+
+    def _transcribe(self, audio):
+        raise NotImplementedError
+
+    def metrics(self):
+        latencies = list(self.latencies)
+        rtfs = list(self.real_time_factors)
+        return {
+            'backend': self.name,
+            'utterances': len(latencies),
+            'failures': self.failures,
+            'latency_p50': percentile(latencies, 50),
+            'latency_p95': percentile(latencies, 95),
+            'rtf_mean': sum(rtfs) / len(rtfs) if rtfs else None,
+        }
+
+
+class GoogleBackend(RecognizerBackend):
+    """Google Web Speech API; needs network access."""
+
+    name = 'google'
+
+    def __init__(self, recognizer=None, **kwargs):
+        super().__init__(**kwargs)
+        self.recognizer = recognizer or sr.Recognizer()
+
+    def _transcribe(self, audio):
+        return self.recognizer.recognize_google(audio)
+
+
+class WhisperBackend(RecognizerBackend):
+    """Local OpenAI Whisper model run on the CPU through ``speech_recognition``."""
+
+    name = 'whisper'
+
+    def __init__(self, recognizer=None, model='base.en', **kwargs):
+        super().__init__(**kwargs)
+        self.recognizer = recognizer or sr.Recognizer()
+        self.model = model
+
+    def _transcribe(self, audio):
+        text = self.recognizer.recognize_whisper(audio, model=self.model).strip()
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+
+class VoskBackend(RecognizerBackend):
+    """Offline Kaldi-based recognition with a local Vosk model directory."""
+
+    name = 'vosk'
+    sample_rate = 16000
+
+    def __init__(self, model_path=None, **kwargs):
+        super().__init__(**kwargs)
+        self.model_path = model_path or os.environ.get('VOSK_MODEL_PATH', 'models/vosk')
+        self._vosk = None
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _load_model(self):
+        with self._lock:
+            if self._model is None:
+                try:
+                    import vosk
+                except ImportError as e:
+                    raise sr.RequestError(f"vosk is not installed: {e}")
+                if not os.path.isdir(self.model_path):
+                    raise sr.RequestError(f"Vosk model not found at {self.model_path}")
+                vosk.SetLogLevel(-1)
+                try:
+                    self._model = vosk.Model(self.model_path)
+                except Exception as e:  # vosk raises a bare Exception for an unreadable model
+                    raise sr.RequestError(f"Could not load the Vosk model at {self.model_path}: {e}")
+                self._vosk = vosk
+            return self._model
+
+    def _transcribe(self, audio):
+        model = self._load_model()
+        recognizer = self._vosk.KaldiRecognizer(model, self.sample_rate)
+        recognizer.AcceptWaveform(audio.get_raw_data(convert_rate=self.sample_rate, convert_width=2))
+        text = json.loads(recognizer.FinalResult()).get('text', '').strip()
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+
+class StubBackend(RecognizerBackend):
+    """Deterministic offline stand-in for tests and replays.
+
+    Returns the transcript registered for the exact audio bytes, else
+    ``default``; with neither, the audio counts as not understood.
+    """
+
+    name = 'stub'
+
+    def __init__(self, default=None, **kwargs):
+        super().__init__(**kwargs)
+        self.default = default
+        self._transcripts = {}
+
+    @staticmethod
+    def _key(frame_data):
+        return hashlib.sha1(frame_data).hexdigest()
+
+    def register(self, audio, text):
+        self._transcripts[self._key(audio.frame_data)] = text
+
+    def _transcribe(self, audio):
+        text = self._transcripts.get(self._key(audio.frame_data), self.default)
+        if text is None:
+            raise sr.UnknownValueError()
+        return text
+
+
+class FallbackRecognizer:
+    """Tries backends in order, moving on when one is unavailable.
+
+    A ``sr.RequestError`` (network down, model missing) always falls through to
+    the next backend; ``sr.UnknownValueError`` does so only with
+    ``fallback_on_unknown``. The last error is re-raised when every backend fails.
+    """
+
+    def __init__(self, backends, fallback_on_unknown=False):
+        if not backends:
+            raise ValueError("At least one recognizer backend is required.")
+        self.backends = list(backends)
+        self.fallback_on_unknown = fallback_on_unknown
+
+    def transcribe(self, audio):
+        error = None
+        for backend in self.backends:
+            try:
+                return backend.transcribe(audio)
+            except sr.RequestError as e:
+                logger.warning(f"Recognizer backend {backend.name} unavailable: {e}")
+                error = e
+            except sr.UnknownValueError as e:
+                if not self.fallback_on_unknown:
+                    raise
+                error = e
+        raise error
+
+    __call__ = transcribe
+
+    def metrics(self):
+        return [backend.metrics() for backend in self.backends]
+
+
+BACKENDS = {
+    'google': GoogleBackend,
+    'whisper': WhisperBackend,
+    'vosk': VoskBackend,
+    'stub': StubBackend,
+}
+
+
+def create_backend(name, recognizer=None):
+    backend_class = BACKENDS[name]
+    if backend_class in (GoogleBackend, WhisperBackend):
+        return backend_class(recognizer)
+    return backend_class()
+
+
+def build_recognizer(recognizer=None, order=None):
+    """Build a ``FallbackRecognizer`` from a comma-separated backend order.
+
+    The order defaults to the ``RECOGNIZER_BACKENDS`` environment variable, then
+    ``google``, which keeps the previous behaviour.
+    """
+    order = order or os.environ.get('RECOGNIZER_BACKENDS', 'google')
+    names = [name.strip() for name in order.split(',') if name.strip()]
+    return FallbackRecognizer([create_backend(name, recognizer) for name in names])
@@ -0,0 +1,195 @@
+import asyncio
+import logging
+import re
+import time
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"[\w']+")
+
+# Built-in patterns, ranked with the ones learned in the database; their uses are only counted in memory.
+DEFAULT_RESPONSES = [
+    ('hello', "Hello! How can I assist you today?"),
+    ('hi', "Hello! How can I assist you today?"),
+    ('hey', "Hello! How can I assist you today?"),
+    ('how are you', "I'm just a program, but thank you for asking!"),
+]
+
+
+def timestamp():
+    """The current UTC time in the format of SQLite's ``CURRENT_TIMESTAMP``, so the two compare as strings."""
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime())
+
+
+def tokenize(text):
+    return tuple(_WORD.findall(text.lower()))
+
+
+class PhraseMatcher:
+    """Whole-word phrase lookup whose cost does not grow with the number of patterns.
+
+    Patterns are indexed by their lowercased word sequence in a hash table, so
+    matching a text probes each of its word n-grams up to the longest pattern
+    length once. Patterns can be added, re-ranked and removed one at a time,
+    without rebuilding anything.
+    """
+
+    def __init__(self):
+        self._responses = defaultdict(dict)  # words -> {response: (frequency, last_used)}
+        self._patterns_by_response = defaultdict(set)
+        self._length_counts = defaultdict(int)
+        self.max_words = 0
+
+    def __len__(self):
+        return len(self._responses)
+
+    def add(self, pattern, response, frequency=1, last_used=''):
+        words = tokenize(pattern)
+        if not words:
+            return
+        if words not in self._responses:
+            self._length_counts[len(words)] += 1
+            self.max_words = max(self.max_words, len(words))
+        self._responses[words][response] = (frequency, last_used)
+        self._patterns_by_response[response].add(words)
+
+    def remove(self, pattern, response=None):
+        words = tokenize(pattern)
+        candidates = self._responses.get(words)
+        if candidates is None:
+            return
+        for removed in list(candidates) if response is None else [response]:
+            candidates.pop(removed, None)
+            self._patterns_by_response[removed].discard(words)
+            if not self._patterns_by_response[removed]:
+                del self._patterns_by_response[removed]
+        if not candidates:
+            del self._responses[words]
+            self._length_counts[len(words)] -= 1
+            if not self._length_counts[len(words)]:
+                del self._length_counts[len(words)]
+                self.max_words = max(self._length_counts, default=0)
+
+    def touch(self, response, last_used=None):
+        """Bump the in-memory frequency of every pattern that maps to ``response`` and mark it used now."""
+        last_used = last_used or timestamp()
+        for words in self._patterns_by_response.get(response, ()):
+            frequency, _ = self._responses[words][response]
+            self._responses[words][response] = (frequency + 1, last_used)
+
+    def matches(self, text):
+        """Return ``(response, frequency, last_used)`` for every pattern found in ``text``."""
+        words = tokenize(text)
+        found = []
+        for start in range(len(words)):
+            for length in range(1, min(self.max_words, len(words) - start) + 1):
+                candidates = self._responses.get(words[start:start + length])
+                if candidates:
+                    found.extend((response, frequency, last_used)
+                                 for response, (frequency, last_used) in candidates.items())
+        return found
+
+    def best(self, text):
+        found = self.matches(text)
+        if not found:
+            return None
+        return max(found, key=lambda match: (match[1], match[2]))[0]
+
+
+class ResponseStore:
+    """Pattern → response retrieval backed by the ``Responses`` table.
+
+    ``load()`` reads every row once; ``refresh()`` then only reads rows whose
+    ``last_used`` changed since the previous sync. ``get_best_response`` is
+    synchronous and never touches the database, ranking matching responses by
+    frequency and then recency. The built-in ``DEFAULT_RESPONSES`` are always
+    available, even before the database is loaded, and are ranked together
+    with the stored responses. Once loaded, the store refreshes itself after
+    every ``ChatDatabase.flush``.
+    """
+
+    def __init__(self, database=None, defaults=DEFAULT_RESPONSES):
+        self.database = database
+        self.matcher = PhraseMatcher()
+        self._synced_until = None
+        self._loop = None
+        self._defaults = PhraseMatcher()
+        for pattern, response in defaults:
+            self._defaults.add(pattern, response)
+
+    async def load(self, database=None):
+        self.database = database or self.database
+        self.matcher = PhraseMatcher()
+        self._synced_until = None
+        self._loop = asyncio.get_running_loop()
+        if self.refresh not in self.database.flush_listeners:
+            self.database.flush_listeners.append(self.refresh)
+        await self.refresh()
+        logger.info(f"Loaded {len(self.matcher)} response patterns.")
+
+    async def refresh(self):
+        """Apply rows added or updated since the last sync."""
+        db = await self.database.connect()
+        if self._synced_until is None:
+            cursor = await db.execute('SELECT pattern, response, frequency, last_used FROM Responses')
+        else:
+            cursor = await db.execute('SELECT pattern, response, frequency, last_used FROM Responses WHERE last_used >= ?',
+                                      (self._synced_until,))
+        rows = await cursor.fetchall()
+        await cursor.close()
+        for pattern, response, frequency, last_used in rows:
+            last_used = last_used or ''
+            self.matcher.add(pattern, response, frequency, last_used)
+            if self._synced_until is None or last_used > self._synced_until:
+                self._synced_until = last_used
+        if self._synced_until is None:
+            self._synced_until = ''
+        return len(rows)
+
+    async def add_response(self, pattern, response):
+        db = await self.database.connect()
+        await db.execute('INSERT OR IGNORE INTO Responses (pattern, response) VALUES (?, ?)', (pattern, response))
+        await db.commit()
+        self.matcher.add(pattern, response)
+
+    async def remove_response(self, pattern, response):
+        db = await self.database.connect()
+        await db.execute('DELETE FROM Responses WHERE pattern = ? AND response = ?', (pattern, response))
+        await db.commit()
+        self.matcher.remove(pattern, response)
+
+    async def record_use(self, response):
+        """Count a use of ``response`` in memory now and in the database with the next flush."""
+        self._touch(response)
+        if self.database is not None:
+            await self.database.update_response_frequency(response)
+
+    def note_use(self, response):
+        """``record_use`` for callers on any thread; the database write runs on the loop that loaded the store.
+
+        Before ``load()`` only the in-memory ranking is updated.
+        """
+        if self._loop is None or self._loop.is_closed():
+            self._touch(response)
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            asyncio.ensure_future(self.record_use(response))
+        else:
+            asyncio.run_coroutine_threadsafe(self.record_use(response), self._loop)
+
+    def _touch(self, response):
+        last_used = timestamp()
+        self._defaults.touch(response, last_used)
+        self.matcher.touch(response, last_used)
+
+    def get_best_response(self, text):
+        """Best built-in or stored response for ``text`` by frequency, then recency, or None when nothing matches."""
+        found = self._defaults.matches(text) + self.matcher.matches(text)
+        if not found:
+            return None
+        return max(found, key=lambda match: (match[1], match[2]))[0]
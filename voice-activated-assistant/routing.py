@@ -0,0 +1,124 @@
+import threading
+import time
+from collections import Counter
+
+SKIP = 'skip'
+EXTRACTIVE = 'extractive'
+ABSTRACTIVE = 'abstractive'
+
+
+class RouteMetrics:
+    """Thread-safe count and total seconds of each summary route."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = Counter()
+        self.seconds = Counter()
+
+    def record(self, route, count, seconds):
+        with self._lock:
+            self.counts[route] += count
+            self.seconds[route] += seconds
+
+    def snapshot(self):
+        with self._lock:
+            return {route: {'count': self.counts[route], 'seconds': self.seconds[route]}
+                    for route in (SKIP, EXTRACTIVE, ABSTRACTIVE)}
+
+
+# Shared by every router, so the figures cover all MLModel instances in the process
+_route_metrics = RouteMetrics()
+
+
+def get_route_metrics():
+    return _route_metrics
+
+
+class SummaryRouter:
+    """Chooses how to summarize a text from its length in summarizer tokens.
+
+    Texts under ``short_tokens`` are returned as they are; there is nothing to
+    summarize in a voice command. Texts under ``long_tokens`` get an
+    extractive summary of their ``extractive_sentences`` highest-scoring
+    sentences from the spaCy ``Doc``. Only longer texts, such as scraped web
+    pages, go through the abstractive summarizer. Single sentences
+    (``sentences=True``) cannot be shortened by picking sentences, so those
+    of medium length go to the abstractive summarizer too. ``metrics()``
+    reports how often each route was taken and how long it took, counted in
+    ``route_metrics``: by default the process-wide ``RouteMetrics`` shared by
+    every router.
+    """
+
+    def __init__(self, ml_model, short_tokens=30, long_tokens=200, extractive_sentences=2, route_metrics=None):
+        self.ml_model = ml_model
+        self.short_tokens = short_tokens
+        self.long_tokens = long_tokens
+        self.extractive_sentences = extractive_sentences
+        self.route_metrics = route_metrics or get_route_metrics()
+
+    def route(self, token_count, sentences=False):
+        if token_count < self.short_tokens:
+            return SKIP
+        if token_count < self.long_tokens and not sentences:
+            return EXTRACTIVE
+        return ABSTRACTIVE
+
+    def summarize(self, text, doc=None):
+        return self.summarize_many([text], [doc])[0]
+
+    def summarize_many(self, texts, docs=None, sentences=False):
+        """Route each text and summarize it; abstractive ones are batched together.
+
+        ``docs`` are the texts' parsed ``Doc`` objects, if available. With
+        ``sentences`` every text is a single sentence and is never routed to
+        the extractive summary.
+        """
+        texts = list(texts)
+        docs = list(docs) if docs is not None else [None] * len(texts)
+        if not texts:
+            return []
+        routes = [self.route(count, sentences) for count in self.ml_model.count_tokens(texts)]
+        summaries = list(texts)
+
+        start = time.perf_counter()
+        for i, route in enumerate(routes):
+            if route == EXTRACTIVE:
+                summaries[i] = self.extractive_summary(texts[i], docs[i])
+        self._record(routes, EXTRACTIVE, time.perf_counter() - start)
+
+        pending = [i for i, route in enumerate(routes) if route == ABSTRACTIVE]
+        start = time.perf_counter()
+        if pending:
+            for i, summary in zip(pending, self.ml_model.summarize_batch([texts[i] for i in pending])):
+                summaries[i] = summary
+        self._record(routes, ABSTRACTIVE, time.perf_counter() - start)
+        self._record(routes, SKIP, 0.0)
+        return summaries
+
+    def _record(self, routes, route, seconds):
+        count = routes.count(route)
+        if count:
+            self.route_metrics.record(route, count, seconds)
+
+    def extractive_summary(self, text, doc=None):
+        """Join the top sentences, in their original order, scored by the frequency of their content words."""
+        if doc is None or not doc.has_annotation('SENT_START'):
+            doc = self.ml_model.nlp(text)
+        sentences = list(doc.sents)
+        if len(sentences) <= self.extractive_sentences:
+            return text
+        frequencies = Counter(token.lower_ for token in doc if token.is_alpha and not token.is_stop)
+        if not frequencies:
+            return text
+        top = max(frequencies.values())
+
+        def score(sentence):
+            words = [token.lower_ for token in sentence if token.is_alpha and not token.is_stop]
+            return sum(frequencies[word] / top for word in words)
+
+        ranked = sorted(range(len(sentences)), key=lambda i: score(sentences[i]), reverse=True)
+        chosen = sorted(ranked[:self.extractive_sentences])
+        return ' '.join(sentences[i].text.strip() for i in chosen)
+
+    def metrics(self):
+        return self.route_metrics.snapshot()
@@ -0,0 +1,145 @@
+import logging
+import asyncio
+import sys
+import speech_recognition as sr
+from ML import create_ml_model  # Local MLModel, or a client of the inference server
+import analysis_context
+from analysis_context import AnalysisContext, as_context
+from recognition_backends import build_recognizer
+from database_interaction import ChatDatabase
+from response_store import ResponseStore
+from tts_worker import get_tts_worker
+from streaming_pipeline import SpeechPipeline, MicrophoneSource, WavFileSource, AudioCaptureSession
+from tracing import span, traced
+from web_scraper import WebScraper, summarize_long_texts
+
+# Initialize the logger
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# spaCy and transformers models come from the shared registry on first use
+
+# Initialize the text-to-speech and speech recognition engines
+try:
+    tts = get_tts_worker()  # One worker per process, shared by every module; tts.say() returns immediately
+    recognizer = sr.Recognizer()
+    recognition = build_recognizer(recognizer)  # Backend order from RECOGNIZER_BACKENDS
+    microphone = sr.Microphone()
+    capture_session = AudioCaptureSession(MicrophoneSource(microphone))
+    capture_session.segmenter.on_speech_start = tts.interrupt  # Barge-in: new speech stops the current reply
+    capture_session.segmenter.playback = tts.is_speaking  # so the reply's own echo does not barge in
+except Exception as e:
+    logger.error(f"Failed to initialize speech engines: {e}")
+    raise SystemExit(e)
+
+# Create an instance of MLModel; it shares its models with every other instance
+ml_model = create_ml_model(logger)
+
+DATABASE_FILE = 'chat_memory.db'
+
+# Pattern-matched responses; run_streaming (or main) loads the stored patterns once the database is open
+response_store = ResponseStore()
+
+# Pooled HTTP session with a conditional-GET disk cache for scrape_many
+web_scraper = WebScraper()
+
+def extract_entities(text):
+    """Extract named entities using spaCy's NER.
+
+    Accepts raw text, which is parsed with only the NER components enabled, or an
+    ``AnalysisContext`` whose existing parse is reused.
+    """
+    return analysis_context.extract_entities(text, ml_model)
+
+def parse_dates(text):
+    """Parse dates from text (or an ``AnalysisContext``) using spaCy's NER and dateutil."""
+    return analysis_context.parse_dates(text, ml_model)
+
+@traced('analyze_text')
+def analyze_text(text):
+    """Enhanced NLP processing with machine learning integration."""
+    context = as_context(text, ml_model)
+    entities = extract_entities(context)
+    sentiment = context.sentiment
+    summary = context.summary
+    logger.info(f'Entities: {entities}, Sentiment: {sentiment}, Summary: {summary}')
+    return entities, sentiment, summary
+
+def scrape_many(urls):
+    """Scrape paragraph text from several webpages concurrently and analyze it.
+
+    Returns ``{url: (entities, sentiment, summary)}``, with ``None`` for pages that
+    could not be fetched. Long pages are summarized window by window, with the
+    windows of all pages batched together.
+    """
+    pages = web_scraper.scrape_many(urls)
+    fetched = [url for url, text in pages.items() if text is not None]
+    texts = [pages[url] for url in fetched]
+    contexts = AnalysisContext.bulk(texts, ml_model, ner_only=True)
+    sentiments = ml_model.analyze_sentiment_batch(texts)
+    summaries = summarize_long_texts(texts, ml_model)
+    results = dict.fromkeys(pages)
+    for url, context, sentiment, summary in zip(fetched, contexts, sentiments, summaries):
+        results[url] = (context.entities, sentiment, summary)
+        logger.info(f'{url}: Entities: {context.entities}, Sentiment: {sentiment}, Summary: {summary}')
+    return results
+
+def scrape_web_page(url):
+    """Scrape text from a webpage and analyze it."""
+    return scrape_many([url])[url]
+
+def dynamic_response(text):
+    """Generate responses from the built-in and stored response patterns."""
+    response = response_store.get_best_response(text)
+    if response is not None:
+        response_store.note_use(response)  # Called from a pipeline worker thread
+        return response
+    return f"You said: {text}"
+
+async def serve(pipeline):
+    """Run ``pipeline`` with the stored responses loaded, keeping the database open while it runs."""
+    database = ChatDatabase(DATABASE_FILE)
+    try:
+        await database.init_db()
+        await response_store.load(database)
+        await pipeline.run()
+    finally:
+        await database.close()
+
+def run_streaming(source=None):
+    """Run the assistant as a streaming pipeline of concurrent capture, recognition, analysis and speech stages.
+
+    ``source`` defaults to the microphone; pass a ``WavFileSource`` to replay a recording.
+    """
+    if source is None:
+        session = capture_session
+    else:
+        session = AudioCaptureSession(source)
+        session.segmenter.on_speech_start = tts.interrupt
+        session.segmenter.playback = tts.is_speaking
+    pipeline = SpeechPipeline(session, recognition.transcribe, dynamic_response, tts.say, segmenter=session.segmenter)
+    with session:
+        asyncio.run(serve(pipeline))
+
+def listen_and_respond():
+    """Listen to user speech and respond based on content analysis."""
+    logger.info("Listening for speech...")
+    try:
+        with span('turn'):
+            # The capture session keeps the microphone open and calibrated across turns
+            with span('capture'):
+                audio = capture_session.listen()
+            speech_text = recognition.transcribe(audio)
+            logger.info(f"Recognized speech: {speech_text}")
+            response = dynamic_response(speech_text)
+            tts.say(response)
+    except sr.UnknownValueError:
+        tts.say("I didn't catch that. Could you please repeat?")
+    except sr.RequestError as e:
+        tts.say("I'm having trouble with the speech service right now.")
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}")
+        tts.say("An error occurred. Please try again.")
+
+if __name__ == "__main__":
+    run_streaming(WavFileSource(sys.argv[1]) if len(sys.argv) > 1 else None)
\ No newline at end of file
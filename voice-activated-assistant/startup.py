@@ -0,0 +1,92 @@
+import importlib.metadata
+import logging
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class StartupProfiler:
+    """Records how long startup phases take and when milestones are reached.
+
+    Times are measured from the profiler's creation, so create it as early as
+    possible. Imports are timed by wrapping plain import statements in
+    ``phase()``, which keeps them visible to PyInstaller; for the imports of
+    their dependencies run ``python -X importtime main.py``.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = []
+        self.marks = {}
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def mark(self, name):
+        """Record that milestone ``name`` was reached now, unless it already was."""
+        self.marks.setdefault(name, time.perf_counter() - self.started)
+
+    def report(self):
+        lines = [f"{name}: {seconds * 1000:.0f} ms" for name, seconds in self.phases]
+        lines += [f"{name} at {seconds * 1000:.0f} ms" for name, seconds in sorted(self.marks.items(), key=lambda item: item[1])]
+        return '\n'.join(lines)
+
+
+def package_installed(name):
+    """Check for an installed distribution through its metadata, without importing it."""
+    try:
+        importlib.metadata.distribution(name)
+        return True
+    except importlib.metadata.PackageNotFoundError:
+        return False
+
+
+def ensure_spacy_models(*models):
+    for model in models:
+        if package_installed(model):
+            logger.info(f"Model {model} is already installed.")
+        else:
+            logger.info(f"Model {model} not found. Installing...")
+            # Install the model using subprocess to ensure compatibility with the environment
+            subprocess.check_call([sys.executable, "-m", "spacy", "download", model])
+
+
+class ModelWarmup(threading.Thread):
+    """Runs slow startup steps in the background and reports progress.
+
+    ``steps`` is a list of ``(label, callable)``. ``on_progress(label, done, total)``
+    is called before each step and once more with ``label=None`` after the last;
+    ``on_error(label, exception)`` is called instead if a step raises, and the
+    remaining steps are skipped. Both are called on the warmup thread.
+    """
+
+    def __init__(self, steps, on_progress=None, on_error=None, profiler=None):
+        super().__init__(name='model-warmup', daemon=True)
+        self.steps = list(steps)
+        self.on_progress = on_progress or (lambda label, done, total: None)
+        self.on_error = on_error or (lambda label, exception: None)
+        self.profiler = profiler or StartupProfiler()
+        self.results = {}
+
+    def run(self):
+        total = len(self.steps)
+        for done, (label, step) in enumerate(self.steps):
+            self.on_progress(label, done, total)
+            try:
+                with self.profiler.phase(label):
+                    self.results[label] = step()
+            except Exception as e:
+                logger.error(f"Startup step '{label}' failed: {e}")
+                self.on_error(label, e)
+                return
+        self.profiler.mark('models warm')
+        self.on_progress(None, total, total)
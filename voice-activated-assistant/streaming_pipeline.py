@@ -0,0 +1,95 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+import speech_recognition as sr
+from audio_capture import MicrophoneSource, WavFileSource, EnergySegmenter, AudioCaptureSession
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of the stream as it flows from one stage's queue to the next.
+_END = object()
+
+
+class SpeechPipeline:
+    """Capture → recognition → analysis → speech as concurrent stages joined by bounded queues.
+
+    Each stage runs its blocking callable on its own single-thread executor, so
+    the next utterance is captured and recognized while the previous response is
+    still being analyzed or spoken. ``recognize`` takes an ``sr.AudioData`` and
+    returns text, ``respond`` takes text and returns the reply, and ``speak``
+    takes the reply. ``queue_size`` bounds how far capture may run ahead.
+    """
+
+    def __init__(self, source, recognize, respond, speak, segmenter=None, queue_size=4):
+        self.source = source
+        self.recognize = recognize
+        self.respond = respond
+        self.speak = speak
+        self.segmenter = (segmenter or getattr(source, 'segmenter', None)
+                          or EnergySegmenter(source.sample_rate, source.sample_width))
+        self.queue_size = queue_size
+        self._stopping = False
+
+    def stop(self):
+        self._stopping = True
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        utterances = asyncio.Queue(self.queue_size)
+        transcripts = asyncio.Queue(self.queue_size)
+        replies = asyncio.Queue(self.queue_size)
+        executors = [ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+                     for name in ('capture', 'recognize', 'respond', 'speak')]
+        try:
+            await asyncio.gather(
+                loop.run_in_executor(executors[0], self._capture, loop, utterances),
+                self._stage(executors[1], utterances, transcripts, self._recognize),
+                self._stage(executors[2], transcripts, replies, self.respond),
+                self._stage(executors[3], replies, None, self.speak),
+            )
+        finally:
+            self._stopping = True
+            for executor in executors:
+                executor.shutdown(wait=False)
+
+    def _capture(self, loop, utterances):
+        def put(item):
+            asyncio.run_coroutine_threadsafe(utterances.put(item), loop).result()
+
+        try:
+            for chunk in self.source.chunks():
+                if self._stopping:
+                    break
+                frame_data = self.segmenter.feed(chunk)
+                if frame_data is not None:
+                    put(sr.AudioData(frame_data, self.source.sample_rate, self.source.sample_width))
+            frame_data = self.segmenter.flush()
+            if frame_data is not None:
+                put(sr.AudioData(frame_data, self.source.sample_rate, self.source.sample_width))
+        finally:
+            put(_END)
+
+    def _recognize(self, audio):
+        try:
+            return self.recognize(audio)
+        except sr.UnknownValueError:
+            logger.info("Speech was not understood.")
+        except sr.RequestError as e:
+            logger.error(f"Speech service error: {e}")
+        return None
+
+    async def _stage(self, executor, inbox, outbox, func):
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await inbox.get()
+            if item is _END:
+                if outbox is not None:
+                    await outbox.put(_END)
+                return
+            try:
+                result = await loop.run_in_executor(executor, func, item)
+            except Exception as e:
+                logger.error(f"Error in speech pipeline stage {getattr(func, '__name__', func)}: {e}")
+                continue
+            if outbox is not None and result is not None:
+                await outbox.put(result)
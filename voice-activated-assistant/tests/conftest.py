@@ -0,0 +1,138 @@
+import asyncio
+import os
+import sys
+import wave
+import numpy as np
+import pytest
+
+# The app is a flat directory of modules, imported by their file names
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeTokenizer:
+    """Whitespace tokenizer with the call signature of a transformers tokenizer."""
+
+    def __call__(self, texts, add_special_tokens=True):
+        return {'input_ids': [text.split() for text in texts]}
+
+
+class FakeSummarizer:
+    """Summarization pipeline stand-in that keeps the first five words and records its inputs."""
+
+    tokenizer = FakeTokenizer()
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts, **kwargs):
+        self.calls.append(list(texts))
+        return [{'summary_text': ' '.join(text.split()[:5])} for text in texts]
+
+
+class FakeSentiment:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts, **kwargs):
+        self.calls.append(list(texts))
+        return [{'label': 'NEGATIVE' if 'bad' in text else 'POSITIVE', 'score': 0.9} for text in texts]
+
+
+class FakeRegistry:
+    """Model registry serving a blank spaCy pipeline and fake transformers pipelines."""
+
+    def __init__(self):
+        import spacy
+        self.nlp = spacy.blank('en')
+        self.nlp.add_pipe('sentencizer')
+        ruler = self.nlp.add_pipe('entity_ruler')
+        ruler.add_patterns([{'label': 'PERSON', 'pattern': 'Alice'}, {'label': 'GPE', 'pattern': 'Paris'}])
+        self.summarizer = FakeSummarizer()
+        self.sentiment = FakeSentiment()
+
+    def spacy(self, model_name):
+        return self.nlp
+
+    def pipeline(self, task, model_name, quantize=False):
+        return self.summarizer if task == 'summarization' else self.sentiment
+
+    def tokenizer(self, model_name):
+        return FakeTokenizer()
+
+
+class ListLogger:
+    def __init__(self):
+        self.errors = []
+
+    def log_info(self, message):
+        pass
+
+    def log_error(self, message):
+        self.errors.append(message)
+
+
+@pytest.fixture
+def registry():
+    pytest.importorskip('spacy')
+    return FakeRegistry()
+
+
+@pytest.fixture
+def ml_model(registry, monkeypatch):
+    import routing
+    from inference_cache import InferenceCache
+    from ML import MLModel
+    # Route counts are process-wide; start each test from zero
+    monkeypatch.setattr(routing, '_route_metrics', routing.RouteMetrics())
+    return MLModel(ListLogger(), registry=registry, cache=InferenceCache(max_entries=0), profile='accurate')
+
+
+def write_wav(path, samples, sample_rate=16000):
+    """Write 16-bit mono ``samples`` (a NumPy array) to ``path``."""
+    with wave.open(str(path), 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(samples.astype('<i2').tobytes())
+    return str(path)
+
+
+RATE = 16000
+
+
+def recording(tmp_path, parts):
+    """Write a WAV of ``(seconds, amplitude)`` parts: low noise below 100, a 440 Hz tone above."""
+    rng = np.random.default_rng(0)
+    pieces = []
+    for seconds, amplitude in parts:
+        count = int(seconds * RATE)
+        if amplitude < 100:
+            pieces.append(rng.normal(0, amplitude, count))
+        else:
+            pieces.append(amplitude * np.sin(2 * np.pi * 440 * np.arange(count) / RATE))
+    return write_wav(tmp_path / 'speech.wav', np.concatenate(pieces), RATE)
+
+
+def run_with_database(path, scenario, **options):
+    """Run ``scenario(database)`` on a fresh ``ChatDatabase``, closing it even when the scenario fails.
+
+    An unclosed aiosqlite connection keeps its thread alive and hangs the test run.
+    """
+    from database_interaction import ChatDatabase
+
+    async def main():
+        database = ChatDatabase(str(path), **options)
+        try:
+            await database.init_db()
+            return await scenario(database)
+        finally:
+            await database.close()
+    return asyncio.run(main())
+
+
+async def fetch_all(database, sql, parameters=()):
+    db = await database.connect()
+    cursor = await db.execute(sql, parameters)
+    rows = await cursor.fetchall()
+    await cursor.close()
+    return rows
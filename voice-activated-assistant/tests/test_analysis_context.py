@@ -0,0 +1,37 @@
+from analysis_context import AnalysisContext, extract_entities, parse_dates
+
+TEXT = ' '.join(f"Alice met Bob in Paris on Monday {i} and talked about the river." for i in range(4))
+
+
+class CountingNLP:
+    """Proxy of a spaCy pipeline that counts the texts it parses."""
+
+    def __init__(self, nlp):
+        self.nlp = nlp
+        self.calls = 0
+
+    def __call__(self, text, **kwargs):
+        self.calls += 1
+        return self.nlp(text, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.nlp, name)
+
+
+def test_one_context_is_parsed_once_for_every_analysis(ml_model, registry):
+    registry.nlp = counting = CountingNLP(registry.nlp)
+    context = AnalysisContext(TEXT, ml_model)
+
+    assert ('Alice', 'PERSON') in extract_entities(context, ml_model)
+    assert parse_dates(context, ml_model) == []
+    assert context.summary != TEXT  # extractive, from the same Doc
+    assert len({result['sentence'] for result in context.process() if result['entity'] == 'PERSON'}) == 4
+    assert counting.calls == 1
+
+
+def test_process_reparses_a_context_without_sentence_boundaries(ml_model, registry):
+    doc = registry.nlp(TEXT, disable=['sentencizer'])
+    context = AnalysisContext(TEXT, ml_model, doc=doc, ner_only=True)
+
+    assert context.sentences == [TEXT]
+    assert len({result['sentence'] for result in context.process() if result['entity'] == 'GPE'}) == 4
@@ -0,0 +1,85 @@
+import threading
+import time
+import numpy as np
+from conftest import RATE, recording
+from audio_capture import AudioCaptureSession, EnergySegmenter, WavFileSource
+
+
+class SilentSource:
+    """Endless silence at microphone pace; records whether its stream was closed."""
+
+    sample_rate = 16000
+    sample_width = 2
+    chunk_size = 160
+
+    def __init__(self):
+        self.closed = threading.Event()
+
+    def chunks(self):
+        try:
+            while True:
+                time.sleep(0.01)
+                yield bytes(self.chunk_size * self.sample_width)
+        finally:
+            self.closed.set()
+
+
+def test_stop_ends_a_blocked_listen_and_releases_the_source():
+    source = SilentSource()
+    session = AudioCaptureSession(source, calibration_seconds=0.02)
+    results = []
+    listener = threading.Thread(target=lambda: results.append(session.listen()))
+    listener.start()
+    time.sleep(0.1)
+
+    session.stop()
+    listener.join(timeout=2)
+
+    assert not listener.is_alive()
+    assert results == [None]
+    assert source.closed.is_set()
+    assert session.listen() is None
+
+
+def test_session_calibrates_and_segments_a_recording(tmp_path):
+    path = recording(tmp_path, [(0.5, 20), (0.6, 3000), (1.0, 20), (0.05, 3000), (1.0, 20), (0.8, 3000), (1.0, 20)])
+    utterances = []
+    with AudioCaptureSession(WavFileSource(path, chunk_size=320), calibration_seconds=0.25) as session:
+        assert 50 <= session.noise_floor.threshold < 100  # 1.5x the noise RMS, at least min_threshold
+        while (audio := session.listen()) is not None:
+            utterances.append(len(audio.frame_data) / (2 * RATE))
+
+    # The 50 ms click is dropped; each utterance keeps its speech and the closing pause
+    assert len(utterances) == 2
+    assert [round(seconds, 1) for seconds in utterances] == [1.4, 1.6]
+
+
+def tone(level, samples=160):
+    return np.full(samples, level, dtype='<i2').tobytes()
+
+
+def test_playback_echo_does_not_barge_in():
+    started = []
+    segmenter = EnergySegmenter(16000, 2, energy_threshold=300, min_speech_seconds=0.02, pause_seconds=0.02,
+                                on_speech_start=lambda: started.append(True), playback=lambda: True,
+                                barge_in_chunks=3)
+
+    # The reply's echo: above the usual threshold but below the raised one, or too brief
+    for chunk in [tone(600)] * 10 + [tone(2000)] * 2 + [tone(0)] * 4:
+        assert segmenter.feed(chunk) is None
+    assert started == []
+
+    # Sustained loud speech is a real barge-in, kept from its first chunk
+    results = [segmenter.feed(chunk) for chunk in [tone(2000)] * 4 + [tone(0)] * 2]
+    assert started == [True]
+    assert [len(result) for result in results if result is not None] == [len(tone(0)) * 6]
+
+
+def test_speech_starts_on_the_first_chunk_without_playback():
+    started = []
+    segmenter = EnergySegmenter(16000, 2, energy_threshold=300, on_speech_start=lambda: started.append(True),
+                                playback=lambda: False)
+
+    segmenter.feed(tone(600))
+
+    assert started == [True]
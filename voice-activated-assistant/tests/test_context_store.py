@@ -0,0 +1,108 @@
+import sqlite3
+import pytest
+from conftest import fetch_all, run_with_database
+from context_store import SUMMARY_KEY, ContextStore
+
+
+class StubModel:
+    """Counts whitespace tokens and condenses by keeping the first three words."""
+
+    def count_tokens(self, texts):
+        return [len(text.split()) for text in texts]
+
+    def route_summary(self, text):
+        return ' '.join(text.split()[:3]) + ' ...'
+
+
+def test_init_db_migrates_the_one_row_per_session_contexts_table(tmp_path):
+    path = tmp_path / 'chat.db'
+    with sqlite3.connect(path) as db:
+        db.execute('''CREATE TABLE Contexts (session_id INTEGER PRIMARY KEY AUTOINCREMENT, context_key TEXT NOT NULL,
+                      context_value TEXT NOT NULL, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)''')
+        db.execute("INSERT INTO Contexts (session_id, context_key, context_value) VALUES (7, 'topic', 'weather')")
+
+    async def scenario(database):
+        await database.init_db()  # a second run leaves the migrated table alone
+        columns = [row[1] for row in await fetch_all(database, 'PRAGMA table_info(Contexts)')]
+        rows = await fetch_all(database, 'SELECT id, session_id, context_key, context_value FROM Contexts')
+        return columns, rows
+
+    columns, rows = run_with_database(path, scenario)
+    assert columns[:4] == ['id', 'session_id', 'context_key', 'context_value']
+    assert rows == [(1, '7', 'topic', 'weather')]
+
+
+def test_sessions_are_hydrated_from_the_database(tmp_path):
+    async def scenario(database):
+        store = ContextStore(database, window=3, flush_every=2, flush_interval=60)
+        for i in range(5):
+            await store.add_turn('alice', f'turn {i}', entities=[('Alice', 'PERSON')], sentiment=0.5, summary=f's{i}')
+        await store.add_turn('bob', 'hello')
+        await store.close()
+
+        fresh = ContextStore(database, window=3)
+        turns = await fresh.recent_turns('alice')
+        assert [turn.text for turn in turns] == ['turn 2', 'turn 3', 'turn 4']
+        assert turns[-1].analysis() == ([('Alice', 'PERSON')], 0.5, 's4')
+        assert await fresh.rolling_summary('alice') == 's0 s1 s2 s3 s4'
+        assert (await fresh.recall('bob', '  hello ')).text == 'hello'
+        assert await fresh.recall('bob', 'goodbye') is None
+        # Only the latest rolling summary of each session is kept
+        summaries = await fetch_all(database, 'SELECT session_id FROM Contexts WHERE context_key = ?', (SUMMARY_KEY,))
+        assert sorted(summaries) == [('alice',), ('bob',)]
+
+    run_with_database(tmp_path / 'chat.db', scenario)
+
+
+def test_an_evicted_session_keeps_its_unflushed_turns(tmp_path):
+    async def scenario(database):
+        store = ContextStore(database, max_sessions=1, flush_every=100, flush_interval=60)
+        await store.add_turn('alice', 'first')
+        await store.add_turn('bob', 'evicts alice')
+        assert [turn.text for turn in await store.recent_turns('alice')] == ['first']
+        assert await store.rolling_summary('alice') == 'first'
+        await store.close()
+
+    run_with_database(tmp_path / 'chat.db', scenario)
+
+
+def test_rolling_summary_condenses_older_turns_and_keeps_the_newest(tmp_path):
+    async def scenario(database):
+        store = ContextStore(database, ml_model=StubModel(), summary_tokens=6, flush_interval=60)
+        await store.add_turn('alice', 'one two three')
+        await store.add_turn('alice', 'four five')
+        assert await store.rolling_summary('alice') == 'one two three four five'
+        await store.add_turn('alice', 'six seven')
+        assert await store.rolling_summary('alice') == 'one two three ... six seven'
+
+        plain = ContextStore(database, summary_tokens=4, flush_interval=60)
+        await plain.add_turn('bob', 'one two three')
+        await plain.add_turn('bob', 'four five')
+        assert await plain.rolling_summary('bob') == 'two three four five'
+        await store.close()
+        await plain.close()
+
+    run_with_database(tmp_path / 'chat.db', scenario)
+
+
+def test_a_failed_flush_keeps_its_turns_and_the_latest_summary(tmp_path):
+    async def scenario(database):
+        db = await database.connect()
+        await db.execute("CREATE TRIGGER fail_inserts BEFORE INSERT ON Contexts "
+                         "BEGIN SELECT RAISE(ABORT, 'database is locked'); END")
+        await db.commit()
+        store = ContextStore(database, flush_every=100, flush_interval=60)
+        await store.add_turn('alice', 'first')
+        with pytest.raises(Exception, match='database is locked'):
+            await store.flush()
+        await store.add_turn('alice', 'second')
+
+        await db.execute('DROP TRIGGER fail_inserts')
+        await db.commit()
+        await store.flush()
+        fresh = ContextStore(database)
+        assert [turn.text for turn in await fresh.recent_turns('alice')] == ['first', 'second']
+        assert await fresh.rolling_summary('alice') == 'first second'
+        assert await fetch_all(database, 'SELECT COUNT(*) FROM Contexts') == [(3,)]
+
+    run_with_database(tmp_path / 'chat.db', scenario)
@@ -0,0 +1,112 @@
+import asyncio
+import pytest
+from conftest import fetch_all, run_with_database
+
+
+async def add_responses(database, *responses):
+    db = await database.connect()
+    await db.executemany("INSERT INTO Responses (pattern, response, frequency, last_used) "
+                         "VALUES ('p', ?, 1, '2000-01-01 00:00:00')", [(response,) for response in responses])
+    await db.commit()
+
+
+async def frequencies(database):
+    return dict(await fetch_all(database, 'SELECT response, frequency FROM Responses ORDER BY response'))
+
+
+def test_updates_are_written_once_the_batch_is_full(tmp_path):
+    async def scenario(database):
+        flushes = []
+
+        async def on_flush():
+            flushes.append(True)
+        database.flush_listeners.append(on_flush)
+        await add_responses(database, 'A', 'B')
+
+        for response in ['A', 'B']:
+            await database.update_response_frequency(response)
+        assert await frequencies(database) == {'A': 1, 'B': 1}  # still buffered
+        await database.update_response_frequency('A')
+
+        assert await frequencies(database) == {'A': 3, 'B': 2}
+        assert flushes == [True]
+        rows = await fetch_all(database, "SELECT last_used FROM Responses WHERE response = 'B'")
+        assert rows[0][0] > '2000-01-01 00:00:00'
+
+    run_with_database(tmp_path / 'chat.db', scenario, flush_every=3, flush_interval=60)
+
+
+def test_a_partial_batch_is_written_after_the_interval(tmp_path):
+    async def scenario(database):
+        await add_responses(database, 'A')
+        await database.update_response_frequency('A')
+        await asyncio.sleep(0.1)
+        assert await frequencies(database) == {'A': 2}
+
+    run_with_database(tmp_path / 'chat.db', scenario, flush_every=50, flush_interval=0.01)
+
+
+def test_close_writes_what_is_pending(tmp_path):
+    path = tmp_path / 'chat.db'
+
+    async def update(database):
+        await add_responses(database, 'A')
+        await database.update_response_frequency('A')
+        assert (await fetch_all(database, 'PRAGMA journal_mode'))[0][0] == 'wal'
+    run_with_database(path, update, flush_interval=60)
+
+    async def check(database):
+        return await frequencies(database)
+    assert run_with_database(path, check) == {'A': 2}
+
+
+FAIL_UPDATES = ("CREATE TRIGGER fail_updates BEFORE UPDATE ON Responses "
+                "BEGIN SELECT RAISE(ABORT, 'database is locked'); END")
+
+
+async def execute(database, sql):
+    db = await database.connect()
+    await db.execute(sql)
+    await db.commit()
+
+
+def test_a_failed_flush_keeps_its_batch(tmp_path):
+    async def scenario(database):
+        await add_responses(database, 'A')
+        await execute(database, FAIL_UPDATES)
+        await database.update_response_frequency('A')
+        with pytest.raises(Exception, match='database is locked'):
+            await database.flush()
+
+        await execute(database, 'DROP TRIGGER fail_updates')
+        await database.update_response_frequency('A')
+        await database.flush()
+        assert await frequencies(database) == {'A': 3}  # both uses, each counted once
+
+    run_with_database(tmp_path / 'chat.db', scenario, flush_interval=60)
+
+
+def test_a_failed_timed_flush_is_logged_and_retried(tmp_path, caplog):
+    async def scenario(database):
+        await add_responses(database, 'A')
+        await execute(database, FAIL_UPDATES)
+        await database.update_response_frequency('A')
+        await asyncio.sleep(0.05)
+        assert 'retrying' in caplog.text
+        await execute(database, 'DROP TRIGGER fail_updates')
+        await asyncio.sleep(0.05)
+        assert await frequencies(database) == {'A': 2}
+
+    run_with_database(tmp_path / 'chat.db', scenario, flush_interval=0.01)
+
+
+def test_locks_are_created_in_the_loop_that_uses_them(tmp_path):
+    from database_interaction import ChatDatabase
+    database = ChatDatabase(str(tmp_path / 'chat.db'))  # built before any event loop, like main.py's
+
+    async def use():
+        # Contended while the connection opens; fails on Python 3.9 if the lock belongs to another loop
+        await asyncio.gather(*(database.connect() for _ in range(3)))
+        await database.init_db()
+        await database.close()
+    asyncio.run(use())
@@ -0,0 +1,78 @@
+import sqlite3
+import inference_cache
+from inference_cache import InferenceCache
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(inference_cache.time, 'time', clock)
+    cache = InferenceCache(ttl=10)
+    cache.set('key', 'value')
+
+    clock.now += 5
+    assert cache.get('key') == (True, 'value')
+    clock.now += 6
+    assert cache.get('key') == (False, None)
+    assert cache.stats()['evictions'] == 1
+
+
+def test_batch_computes_each_key_once(tmp_path):
+    cache = InferenceCache(disk_path=str(tmp_path / 'cache.db'))
+    commits = []
+    cache._disk.set_trace_callback(lambda sql: commits.append(sql) if sql == 'COMMIT' else None)
+    calls = []
+
+    def compute_many(texts):
+        calls.append(texts)
+        return [text.upper() for text in texts]
+
+    results = cache.get_or_compute_many('model', ['a', 'a ', 'b', 'a'], compute_many)
+
+    assert results == ['A', 'A', 'B', 'A']
+    assert calls == [['a', 'b']]
+    assert len(commits) == 1
+    cache.close()
+
+
+def test_disk_tier_survives_restarts_and_is_pruned_on_open(tmp_path, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(inference_cache.time, 'time', clock)
+    path = str(tmp_path / 'cache.db')
+    cache = InferenceCache(max_entries=0, ttl=100, disk_path=path)
+    cache.set('old', 1)
+    clock.now += 60
+    for i in range(4):
+        cache.set(f'new-{i}', i)
+        clock.now += 1
+    cache.close()
+
+    reopened = InferenceCache(ttl=100, disk_path=path, max_disk_entries=3)
+    assert reopened.get('new-3') == (True, 3)
+    assert reopened.stats()['disk_hits'] == 1
+    reopened.close()
+
+    clock.now += 50  # 'old' is now past the TTL
+    reopened = InferenceCache(ttl=100, disk_path=path, max_disk_entries=3)
+    reopened.close()
+    with sqlite3.connect(path) as db:
+        keys = {key for key, in db.execute('SELECT key FROM InferenceCache')}
+    assert keys == {'new-1', 'new-2', 'new-3'}
+
+
+def test_disk_tier_is_pruned_while_running(tmp_path):
+    cache = InferenceCache(max_entries=0, disk_path=str(tmp_path / 'cache.db'), max_disk_entries=5, prune_every=4)
+    for i in range(20):
+        cache.set(f'key-{i}', i)
+
+    (count,), = cache._disk.execute('SELECT COUNT(*) FROM InferenceCache').fetchall()
+    assert count <= 5 + 4
+    assert cache.get('key-19') == (True, 19)
+    cache.close()
@@ -0,0 +1,77 @@
+import asyncio
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import inference_server
+from inference_server import InferenceClient, InferenceServer
+
+
+class SlowSentiment:
+    """Worker model whose first batch takes longer than the client waits."""
+
+    def __init__(self, delay):
+        self.delay = delay
+
+    def analyze_sentiment_batch(self, texts):
+        delay, self.delay = self.delay, 0
+        time.sleep(delay)
+        return [len(text) for text in texts]
+
+
+@pytest.fixture
+def server_address(monkeypatch):
+    monkeypatch.setattr(inference_server, '_worker_model', SlowSentiment(delay=0.5))
+    server = InferenceServer(max_wait=0.001)
+    server.pool = ThreadPoolExecutor(max_workers=2)
+    loop = asyncio.new_event_loop()
+    listening = loop.run_until_complete(asyncio.start_server(server.handle_client, '127.0.0.1', 0))
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield f"127.0.0.1:{listening.sockets[0].getsockname()[1]}"
+
+    async def stop():
+        listening.close()
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    asyncio.run_coroutine_threadsafe(stop(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+    server.pool.shutdown(wait=True)
+
+
+def test_client_reconnects_after_a_timeout(server_address):
+    client = InferenceClient(server_address, timeout=0.1)
+
+    with pytest.raises(OSError):
+        client.analyze_sentiment('slow')
+    assert client.analyze_sentiment_batch(['one', 'three']) == [3, 5]
+    client.close()
+
+
+def test_server_answers_requests_sent_before_the_client_stopped_writing(server_address):
+    host, port = server_address.split(':')
+    with socket.create_connection((host, int(port)), timeout=5) as connection:
+        connection.sendall(b'{"id": 7, "method": "analyze_sentiment", "text": "hello"}\n')
+        connection.shutdown(socket.SHUT_WR)
+        answer = connection.makefile('rb').readline()
+
+    assert answer == b'{"id": 7, "result": 5}\n'
+
+
+def test_remote_model_with_a_stdlib_logger_returns_none_when_the_server_is_down(caplog):
+    import logging
+    from inference_cache import InferenceCache
+    from inference_server import RemoteMLModel
+    with socket.socket() as unused:
+        unused.bind(('127.0.0.1', 0))
+        address = f"127.0.0.1:{unused.getsockname()[1]}"
+    model = RemoteMLModel(logging.getLogger('assistant'), address, cache=InferenceCache(max_entries=0))
+
+    assert model.analyze_sentiment('hello') is None
+    assert model.summarize_batch(['hello there']) == ['hello there']  # failed summaries fall back to the text
+    assert 'Error in remote sentiment analysis' in caplog.text
@@ -0,0 +1,37 @@
+LONG_SENTENCE = "Alice walked " + "slowly along the quiet river bank " * 8 + "before lunch."
+
+
+def test_process_text_summarizes_a_long_sentence_abstractively(ml_model, registry):
+    results = ml_model.process_text(LONG_SENTENCE)
+
+    assert results == [{'entity': 'PERSON', 'sentence': LONG_SENTENCE, 'sentiment': 0.9,
+                        'summary': 'Alice walked slowly along the'}]
+    assert registry.summarizer.calls == [[LONG_SENTENCE]]
+    assert ml_model.router.metrics()['extractive']['count'] == 0
+
+
+def test_process_text_keeps_short_sentences(ml_model, registry):
+    results = ml_model.process_text("Alice lives in Paris. It is bad.")
+
+    assert [result['entity'] for result in results] == ['PERSON', 'GPE']
+    assert results[0]['summary'] == 'Alice lives in Paris.'
+    assert registry.summarizer.calls == []
+
+
+def test_route_summary_extracts_from_a_medium_text(ml_model, registry):
+    text = ' '.join(f"Sentence {i} mentions the river and the bank." for i in range(6))
+
+    summary = ml_model.route_summary(text)
+
+    assert len(list(registry.nlp(summary).sents)) == ml_model.router.extractive_sentences
+    assert registry.summarizer.calls == []
+
+
+def test_route_metrics_cover_every_model_in_the_process(ml_model, registry):
+    from inference_cache import InferenceCache
+    from ML import MLModel
+    other = MLModel(ml_model.logger, registry=registry, cache=InferenceCache(max_entries=0), profile='accurate')
+
+    other.process_text(LONG_SENTENCE)
+
+    assert ml_model.router.metrics()['abstractive']['count'] == 1
@@ -0,0 +1,37 @@
+import builtins
+import sys
+
+import model_registry
+from model_registry import ModelRegistry, current_rss
+
+
+def without_rss_sources(monkeypatch):
+    """Hide psutil and /proc, as on a Windows build without psutil."""
+    monkeypatch.setitem(sys.modules, 'psutil', None)
+    real_open = builtins.open
+
+    def fake_open(path, *args, **kwargs):
+        if str(path).startswith('/proc/'):
+            raise FileNotFoundError(path)
+        return real_open(path, *args, **kwargs)
+    monkeypatch.setattr(builtins, 'open', fake_open)
+
+
+def test_current_rss_is_unavailable_rather_than_the_peak(monkeypatch):
+    without_rss_sources(monkeypatch)
+    assert current_rss() is None
+
+
+def test_load_without_rss_reports_no_delta(monkeypatch):
+    without_rss_sources(monkeypatch)
+    registry = ModelRegistry()
+    registry._get_or_load(('spacy', 'fake'), object)
+    stats = registry.stats()['spacy:fake']
+    assert stats['rss_delta_bytes'] is None
+    assert 'spacy:fake' in registry.report() and 'n/a' in registry.report()
+
+
+def test_peak_rss_is_reported_separately(monkeypatch):
+    monkeypatch.setitem(sys.modules, 'psutil', None)
+    peak = model_registry.peak_rss()
+    assert peak is None or peak > 0
@@ -0,0 +1,46 @@
+import sys
+import types
+import pytest
+import profiles
+from profiles import PROFILES, apply_thread_settings, get_profile, physical_cores, pin_threads
+
+
+@pytest.fixture
+def torch_threads(monkeypatch):
+    """Stand-in ``torch`` module recording ``set_num_threads`` calls."""
+    calls = []
+    monkeypatch.setitem(sys.modules, 'torch', types.SimpleNamespace(set_num_threads=calls.append))
+    monkeypatch.setattr(profiles, '_applied_threads', None)
+    return calls
+
+
+def test_only_the_accurate_profile_keeps_torchs_thread_default(torch_threads):
+    apply_thread_settings(PROFILES['accurate'])
+    assert torch_threads == []
+
+    apply_thread_settings(PROFILES['fast'])
+    assert torch_threads == [physical_cores()]
+
+
+def test_physical_cores_ignores_hyperthreads(monkeypatch):
+    monkeypatch.setitem(sys.modules, 'psutil', types.SimpleNamespace(cpu_count=lambda logical=True: 8 if logical else 4))
+    assert physical_cores() == 4
+
+
+def test_thread_count_can_be_overridden(monkeypatch, torch_threads):
+    monkeypatch.setenv('ASSISTANT_THREADS', '3')
+    apply_thread_settings(get_profile('accurate'))
+
+    assert torch_threads == [3]
+
+
+def test_pinned_threads_win_over_a_profile(torch_threads):
+    pin_threads(2)
+    apply_thread_settings(get_profile('fast')._replace(num_threads=8))
+
+    assert torch_threads == [2]
+
+
+def test_unknown_profile():
+    with pytest.raises(ValueError, match='choose from accurate, balanced, fast'):
+        get_profile('turbo')
@@ -0,0 +1,35 @@
+import sys
+import pytest
+import speech_recognition as sr
+from recognition_backends import StubBackend, build_recognizer
+
+
+@pytest.fixture
+def audio():
+    return sr.AudioData(bytes(3200), 16000, 2)
+
+
+@pytest.mark.parametrize('order', ['vosk,stub', 'whisper,stub', 'vosk,whisper,stub'])
+def test_a_missing_engine_falls_through_to_the_next_backend(monkeypatch, audio, order):
+    monkeypatch.setitem(sys.modules, 'vosk', None)  # importing either engine now raises ImportError
+    monkeypatch.setitem(sys.modules, 'whisper', None)
+    recognition = build_recognizer(order=order)
+    recognition.backends[-1].default = 'hello'
+
+    assert recognition.transcribe(audio) == 'hello'
+    assert [metrics['failures'] for metrics in recognition.metrics()] == [1] * (len(recognition.backends) - 1) + [0]
+
+
+def test_the_last_error_is_raised_when_every_backend_fails(monkeypatch, audio):
+    monkeypatch.setitem(sys.modules, 'vosk', None)
+
+    with pytest.raises(sr.RequestError, match='vosk'):
+        build_recognizer(order='vosk').transcribe(audio)
+
+
+def test_not_understood_does_not_fall_through_by_default(audio):
+    recognition = build_recognizer(order='stub,stub')
+    recognition.backends[1].default = 'hello'
+
+    with pytest.raises(sr.UnknownValueError):
+        recognition.transcribe(audio)
@@ -0,0 +1,86 @@
+import asyncio
+from conftest import fetch_all, run_with_database
+from response_store import PhraseMatcher, ResponseStore
+
+
+def test_matcher_ranks_by_frequency_then_recency():
+    matcher = PhraseMatcher()
+    matcher.add('weather', 'Sunny.', frequency=3, last_used='2024-01-01 10:00:00')
+    matcher.add('weather today', 'Rainy.', frequency=3, last_used='2024-01-02 10:00:00')
+    matcher.add('today', 'Cloudy.', frequency=1, last_used='2024-01-03 10:00:00')
+
+    assert matcher.best("what's the weather today") == 'Rainy.'
+    assert matcher.best('nothing relevant') is None
+
+
+def test_touch_makes_a_response_the_most_recent():
+    matcher = PhraseMatcher()
+    matcher.add('weather', 'Sunny.', frequency=1, last_used='2024-01-01 10:00:00')
+    matcher.add('weather', 'Rainy.', frequency=3, last_used='2024-01-02 10:00:00')
+
+    matcher.touch('Sunny.')
+
+    assert matcher.best('weather') == 'Rainy.'  # frequency still wins over recency
+    matcher.touch('Sunny.')
+    assert matcher.best('weather') == 'Sunny.'  # a tie on frequency goes to the latest use
+
+
+def test_matcher_remove():
+    matcher = PhraseMatcher()
+    matcher.add('good morning', 'Morning!')
+    matcher.remove('good morning')
+
+    assert matcher.best('good morning to you') is None
+    assert matcher.max_words == 0
+
+
+def test_defaults_answer_before_loading():
+    assert ResponseStore().get_best_response('hello there') == "Hello! How can I assist you today?"
+
+
+def test_store_refreshes_after_each_flush(tmp_path):
+    async def scenario(database):
+        store = ResponseStore(defaults=())
+        await store.load(database)
+        await store.add_response('weather', 'Sunny.')
+        await store.add_response('weather', 'Rainy.')
+        await store.record_use('Rainy.')
+        assert store.get_best_response('weather') == 'Rainy.'
+
+        # A row changed by another writer shows up after the next flush
+        db = await database.connect()
+        await db.execute("UPDATE Responses SET frequency = 10, last_used = '2999-01-01 00:00:00' "
+                         "WHERE response = 'Sunny.'")
+        await db.commit()
+        await database.flush()
+        assert store.get_best_response('weather') == 'Sunny.'
+        assert await fetch_all(database, "SELECT frequency FROM Responses WHERE response = 'Rainy.'") == [(2,)]
+
+    run_with_database(tmp_path / 'chat.db', scenario)
+
+
+def test_note_use_from_a_worker_thread(tmp_path):
+    async def scenario(database):
+        store = ResponseStore(defaults=())
+        await store.load(database)
+        await store.add_response('weather', 'Sunny.')
+        await asyncio.get_running_loop().run_in_executor(None, store.note_use, 'Sunny.')
+        await asyncio.sleep(0.1)  # past the flush interval
+        assert await fetch_all(database, "SELECT frequency FROM Responses WHERE response = 'Sunny.'") == [(2,)]
+
+    run_with_database(tmp_path / 'chat.db', scenario, flush_interval=0.01)
+
+
+def test_defaults_are_ranked_with_stored_responses(tmp_path):
+    async def scenario(database):
+        store = ResponseStore()
+        await store.load(database)
+        await store.add_response('hello', 'Hi there!')
+        await store.record_use('Hi there!')
+        assert store.get_best_response('hello') == 'Hi there!'  # used more often than the default
+
+        await store.record_use("Hello! How can I assist you today?")
+        await store.record_use("Hello! How can I assist you today?")
+        assert store.get_best_response('hello') == "Hello! How can I assist you today?"
+
+    run_with_database(tmp_path / 'chat.db', scenario)
@@ -0,0 +1,22 @@
+import asyncio
+import speech_recognition as sr
+from conftest import RATE, recording
+from audio_capture import AudioCaptureSession, WavFileSource
+from streaming_pipeline import SpeechPipeline
+
+
+def test_pipeline_runs_every_utterance_through_every_stage(tmp_path):
+    path = recording(tmp_path, [(0.5, 20), (0.6, 3000), (1.0, 20), (0.4, 3000), (1.0, 20), (0.8, 3000), (1.0, 20)])
+    spoken = []
+
+    def recognize(audio):
+        seconds = round(len(audio.frame_data) / (2 * RATE), 1)
+        if seconds < 1.3:
+            raise sr.UnknownValueError()  # a failed recognition skips the turn
+        return f'{seconds} seconds'
+
+    with AudioCaptureSession(WavFileSource(path, chunk_size=320), calibration_seconds=0.25) as session:
+        pipeline = SpeechPipeline(session, recognize, lambda text: f'You said {text}.', spoken.append)
+        asyncio.run(pipeline.run())
+
+    assert spoken == ['You said 1.4 seconds.', 'You said 1.6 seconds.']
@@ -0,0 +1,51 @@
+import sys
+import threading
+import time
+from tts_worker import TTSWorker, command_player
+
+
+class BlockingEngine:
+    """pyttsx3 stand-in whose ``runAndWait`` blocks until released."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.spoken = []
+
+    def connect(self, topic, callback):
+        pass
+
+    def say(self, text):
+        self.spoken.append(text)
+
+    def runAndWait(self):
+        self.release.wait(5)
+
+    def stop(self):
+        pass
+
+
+def test_is_speaking_until_the_last_sentence_is_done():
+    engine = BlockingEngine()
+    worker = TTSWorker(engine_factory=lambda: engine, cache_dir=None)
+    assert not worker.is_speaking()
+    worker.start()
+
+    worker.say("First. Second.")
+    assert worker.is_speaking()
+    engine.release.set()
+    worker.wait_until_idle()
+
+    assert not worker.is_speaking()
+    assert engine.spoken == ['First.', 'Second.']
+    worker.stop()
+
+
+def test_command_player_stops_when_interrupted(tmp_path):
+    play = command_player([sys.executable, '-c', 'import time; time.sleep(10)'])
+    interrupted = threading.Event()
+    threading.Timer(0.2, interrupted.set).start()
+
+    start = time.monotonic()
+    play(str(tmp_path / 'reply.wav'), interrupted)
+
+    assert time.monotonic() - start < 5
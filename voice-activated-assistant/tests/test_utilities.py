@@ -0,0 +1,38 @@
+import logging
+import os
+import pytest
+from cryptography.fernet import Fernet
+from utilities import AsyncEncryptedFileHandler, iter_encrypted_log
+
+
+def write_records(path, count, **options):
+    key = Fernet.generate_key()
+    handler = AsyncEncryptedFileHandler(str(path), encryption_key=key, **options)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    for i in range(count):
+        handler.emit(logging.LogRecord('test', logging.INFO, __file__, 0, 'record %d %s', (i, 'x' * 40), None))
+    handler.close()
+    return key
+
+
+def test_without_backups_the_log_is_never_truncated(tmp_path):
+    path = tmp_path / 'app.log'
+    key = write_records(path, 50, maxBytes=3000, backupCount=0, batch_size=8)
+
+    records = list(iter_encrypted_log(str(path), key))
+
+    assert records == [f'record {i} {"x" * 40}' for i in range(50)]
+    assert not os.path.exists(f'{path}.1')
+
+
+@pytest.mark.parametrize('batch_size', [1, 256])
+def test_rotated_files_stay_within_max_bytes(tmp_path, batch_size):
+    path = tmp_path / 'app.log'
+    key = write_records(path, 200, maxBytes=3000, backupCount=20, batch_size=batch_size)
+
+    records = list(iter_encrypted_log(str(path), key, include_backups=True))
+
+    assert records == [f'record {i} {"x" * 40}' for i in range(200)]
+    sizes = [os.path.getsize(file) for file in tmp_path.iterdir()]
+    assert len(sizes) > 1
+    assert max(sizes) <= 3000
@@ -0,0 +1,89 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from web_scraper import WebScraper, chunk_text, summarize_long_texts
+
+PAGE = b'<html><script>var p = "<p>no</p>";</script><p>First  paragraph.</p><div>skip</div><p>Second.</p></html>'
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.requests.append((self.path, self.headers.get('If-None-Match')))
+        if self.path.startswith('/together/'):
+            # Answers only once every /together/ request has arrived, so they must be in flight at once
+            try:
+                self.server.barrier.wait(timeout=5)
+            except threading.BrokenBarrierError:
+                self.send_error(500)
+                return
+        elif self.path == '/missing':
+            self.send_error(404)
+            return
+        if self.headers.get('If-None-Match') == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('ETag', '"v1"')
+        self.send_header('Content-Length', str(len(PAGE)))
+        self.end_headers()
+        self.wfile.write(PAGE)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.requests = []
+    server.barrier = threading.Barrier(3)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.url = f'http://127.0.0.1:{server.server_address[1]}'
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_scrape_many_fetches_concurrently_and_reports_failures(server, tmp_path):
+    scraper = WebScraper(cache_dir=str(tmp_path), max_workers=4, retries=0)
+    urls = [f'{server.url}/together/{i}' for i in range(3)] + [f'{server.url}/missing']
+
+    pages = scraper.scrape_many(urls)
+
+    assert pages == {**{url: 'First paragraph. Second.' for url in urls[:3]}, urls[3]: None}
+    scraper.close()
+
+
+def test_cached_page_is_revalidated_with_its_etag(server, tmp_path):
+    scraper = WebScraper(cache_dir=str(tmp_path), retries=0)
+    url = f'{server.url}/page'
+
+    assert scraper.fetch(url) == 'First paragraph. Second.'
+    assert scraper.fetch(url) == 'First paragraph. Second.'
+    assert server.requests == [('/page', None), ('/page', '"v1"')]
+    scraper.close()
+
+
+def test_chunk_text_splits_at_sentence_boundaries():
+    def count_tokens(texts):
+        return [len(text.split()) for text in texts]
+
+    text = "One two three. Four five. Six seven eight nine ten. Eleven."
+
+    assert chunk_text(text, count_tokens, window_tokens=5) == [
+        "One two three. Four five.", "Six seven eight nine ten.", "Eleven."]
+    assert chunk_text('   ', count_tokens) == []
+
+
+def test_summarize_long_texts_batches_every_window(ml_model, registry):
+    sentences = [f"Sentence {i} " + "is about the quiet river " * 4 + "bank." for i in range(6)]  # 23 tokens each
+
+    summaries = summarize_long_texts([' '.join(sentences), 'Short one.'], ml_model, window_tokens=50)
+
+    # The three two-sentence windows go through the summarizer in one batch
+    assert registry.summarizer.calls[0] == [' '.join(sentences[i:i + 2]) for i in (0, 2, 4)]
+    assert summaries[0] == 'Sentence 0 is about the Sentence 2 is about the Sentence 4 is about the'
+    assert summaries[1] == 'Short one.'
@@ -0,0 +1,246 @@
+import contextvars
+import functools
+import inspect
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from utilities import percentile
+
+logger = logging.getLogger(__name__)
+
+QUANTILES = (50, 95, 99)
+
+# (trace id, span id) of the innermost open span in this thread or task
+_current = contextvars.ContextVar('current_span', default=None)
+_ids = itertools.count(1)
+
+
+class StageHistogram:
+    """Durations of one stage: running count and sum, plus the last ``window`` samples for quantiles."""
+
+    def __init__(self, window=2048):
+        self.count = 0
+        self.total = 0.0
+        self.samples = deque(maxlen=window)
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.samples.append(seconds)
+
+    def quantiles(self):
+        samples = list(self.samples)
+        return {q: percentile(samples, q) for q in QUANTILES}
+
+
+class _NullSpan:
+    """Returned by ``Tracer.span`` while tracing is disabled; does nothing."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def set(self, **attributes):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    def __init__(self, tracer, name, attributes):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+
+    def __enter__(self):
+        parent = _current.get()
+        self.span_id = next(_ids)
+        self.trace_id = parent[0] if parent else self.span_id
+        self.parent_id = parent[1] if parent else None
+        self._token = _current.set((self.trace_id, self.span_id))
+        self.start = time.time()
+        self._began = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self._began
+        _current.reset(self._token)
+        if exc_type is not None:
+            self.attributes['error'] = exc_type.__name__
+        self.tracer._finish(self)
+        return False
+
+    def set(self, **attributes):
+        """Attach attributes to the span, e.g. the backend that served it."""
+        self.attributes.update(attributes)
+
+
+class Tracer:
+    """Per-stage timing of each interaction, with nested spans grouped into traces.
+
+    ``span(name)`` times a block and ``traced(name)`` a function (sync or async).
+    A span opened inside another belongs to the same trace, so one voice turn
+    yields one trace of capture, recognition, parsing, model, database and TTS
+    spans. Every finished span updates its stage's histogram (``summary()``
+    gives p50/p95/p99) and, with ``jsonl_path``, is appended to that file as one
+    JSON object per line. ``serve(port)`` exposes the histograms in the
+    Prometheus text format. While ``enabled`` is false, ``span`` returns a
+    shared no-op and nothing is recorded.
+    """
+
+    def __init__(self, enabled=False, jsonl_path=None, window=2048):
+        self.enabled = enabled
+        self.jsonl_path = jsonl_path
+        self.window = window
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._jsonl = None
+        self._server = None
+
+    @classmethod
+    def from_env(cls):
+        """Configure from ``TRACING`` (1 to enable) and ``TRACE_JSONL`` (a file to append spans to)."""
+        jsonl_path = os.environ.get('TRACE_JSONL') or None
+        enabled = os.environ.get('TRACING', '').lower() in ('1', 'true', 'yes') or jsonl_path is not None
+        return cls(enabled=enabled, jsonl_path=jsonl_path)
+
+    def span(self, name, **attributes):
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name, attributes)
+
+    def traced(self, name=None):
+        """Decorator that runs each call of the function inside ``span(name)``."""
+        def decorate(func):
+            stage = name or func.__qualname__
+            if inspect.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    if not self.enabled:
+                        return await func(*args, **kwargs)
+                    with Span(self, stage, {}):
+                        return await func(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with Span(self, stage, {}):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def _finish(self, span):
+        with self._lock:
+            histogram = self._histograms.get(span.name)
+            if histogram is None:
+                histogram = self._histograms[span.name] = StageHistogram(self.window)
+            histogram.observe(span.duration)
+            if self.jsonl_path:
+                if self._jsonl is None:
+                    self._jsonl = open(self.jsonl_path, 'a', encoding='utf-8')
+                record = {'trace': span.trace_id, 'span': span.span_id, 'parent': span.parent_id, 'name': span.name,
+                          'start': span.start, 'duration_ms': span.duration * 1000}
+                if span.attributes:
+                    record['attributes'] = span.attributes
+                self._jsonl.write(json.dumps(record, default=str) + '\n')
+
+    def summary(self):
+        """Return ``{stage: {count, mean_ms, p50_ms, p95_ms, p99_ms}}`` over the recorded spans."""
+        with self._lock:
+            histograms = {name: (h.count, h.total, h.quantiles()) for name, h in self._histograms.items()}
+        return {name: {'count': count, 'mean_ms': total / count * 1000,
+                       **{f'p{q}_ms': value * 1000 for q, value in quantiles.items()}}
+                for name, (count, total, quantiles) in histograms.items()}
+
+    def report(self):
+        return '\n'.join(f"{name}: n={stats['count']}, p50 {stats['p50_ms']:.1f} ms, "
+                         f"p95 {stats['p95_ms']:.1f} ms, p99 {stats['p99_ms']:.1f} ms"
+                         for name, stats in sorted(self.summary().items()))
+
+    def prometheus_text(self):
+        """Render the stage histograms as a Prometheus ``summary`` metric."""
+        lines = ['# HELP assistant_stage_seconds Duration of each interaction stage.',
+                 '# TYPE assistant_stage_seconds summary']
+        with self._lock:
+            histograms = {name: (h.count, h.total, h.quantiles()) for name, h in self._histograms.items()}
+        for name, (count, total, quantiles) in sorted(histograms.items()):
+            stage = name.replace('\\', '\\\\').replace('"', '\\"')
+            for q, value in quantiles.items():
+                lines.append(f'assistant_stage_seconds{{stage="{stage}",quantile="{q / 100}"}} {value}')
+            lines.append(f'assistant_stage_seconds_sum{{stage="{stage}"}} {total}')
+            lines.append(f'assistant_stage_seconds_count{{stage="{stage}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, port, host='127.0.0.1'):
+        """Serve ``prometheus_text()`` at ``http://host:port/metrics`` from a daemon thread."""
+        tracer = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = tracer.prometheus_text().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=self._server.serve_forever, name='metrics', daemon=True).start()
+        logger.info(f"Serving stage metrics at http://{host}:{self._server.server_port}/metrics")
+        return self._server.server_port
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def close(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        with self._lock:
+            if self._jsonl is not None:
+                self._jsonl.close()
+                self._jsonl = None
+
+
+tracer = Tracer.from_env()
+
+
+def get_tracer():
+    """Return the process-wide tracer."""
+    return tracer
+
+
+def span(name, **attributes):
+    """Time a block as stage ``name`` on the process-wide tracer."""
+    return tracer.span(name, **attributes)
+
+
+def traced(name=None):
+    """Decorator timing each call as stage ``name`` on the process-wide tracer."""
+    return tracer.traced(name)
+
+
+def serve_from_env():
+    """Start the metrics endpoint on ``TRACE_PORT`` when tracing is enabled and the port is set."""
+    port = os.environ.get('TRACE_PORT')
+    if tracer.enabled and port:
+        return tracer.serve(int(port))
+    return None
@@ -0,0 +1,182 @@
+import hashlib
+import logging
+import os
+import queue
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import wave
+from collections import Counter
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+_STOP = object()
+
+
+def split_sentences(text):
+    return [sentence for sentence in _SENTENCE_END.split(text.strip()) if sentence]
+
+
+def _winsound_player(path, interrupted):
+    """Play a WAV file asynchronously with ``winsound``, stopping early if ``interrupted`` is set."""
+    import winsound
+    with wave.open(path, 'rb') as wav:
+        duration = wav.getnframes() / wav.getframerate()
+    winsound.PlaySound(path, winsound.SND_FILENAME | winsound.SND_ASYNC)
+    if interrupted.wait(duration):
+        winsound.PlaySound(None, 0)
+
+
+def command_player(command):
+    """Player that runs ``command`` with the WAV path appended, killing it early if ``interrupted`` is set."""
+    def play(path, interrupted):
+        process = subprocess.Popen(command + [path], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        while process.poll() is None:
+            if interrupted.wait(0.05):
+                process.terminate()
+                break
+        process.wait()
+    return play
+
+
+def default_player():
+    """``winsound`` on Windows, else the first of ``afplay`` (macOS), ``aplay`` or ``paplay`` on the PATH.
+
+    Returns None when none is available; cached audio is then not used.
+    """
+    if sys.platform == 'win32':
+        return _winsound_player
+    for command in (['afplay'], ['aplay', '-q'], ['paplay']):
+        if shutil.which(command[0]):
+            return command_player(command)
+    return None
+
+
+class TTSWorker(threading.Thread):
+    """Speaks queued text on a dedicated thread so callers never block on ``runAndWait``.
+
+    Text is split into sentences and spoken one at a time, so the first
+    sentence starts playing while later ones are still being queued (see
+    ``say_stream``). ``interrupt()`` drops everything queued and stops the
+    current sentence, for barge-in when the user starts talking;
+    ``is_speaking()`` tells capture when the microphone may be hearing the
+    reply. Sentences spoken ``cache_after`` times are rendered once to WAV
+    files in ``cache_dir`` and replayed from there when an audio ``player`` is
+    available (see ``default_player``).
+    """
+
+    def __init__(self, engine_factory=None, cache_dir='tts_cache', cache_after=2, player=None):
+        super().__init__(name='tts-worker', daemon=True)
+        self.engine_factory = engine_factory
+        self.cache_dir = cache_dir
+        self.cache_after = cache_after
+        self.player = player if player is not None else default_player()
+        self._queue = queue.Queue()
+        self._generation = 0
+        self._interrupted = threading.Event()
+        self._counts = Counter()
+        self.engine = None
+
+    def say(self, text):
+        """Queue ``text`` for speaking and return immediately."""
+        for sentence in split_sentences(text):
+            self._queue.put((self._generation, sentence))
+
+    def say_stream(self, chunks):
+        """Queue text as it is produced, speaking each sentence as soon as it is complete."""
+        pending = ''
+        for chunk in chunks:
+            # Everything before the last sentence break is complete; the tail may still grow
+            *complete, pending = _SENTENCE_END.split(pending + chunk)
+            for sentence in complete:
+                if sentence.strip():
+                    self._queue.put((self._generation, sentence.strip()))
+        if pending.strip():
+            self._queue.put((self._generation, pending.strip()))
+
+    def interrupt(self):
+        """Barge-in: drop queued sentences and stop the one being spoken."""
+        self._generation += 1
+        self._interrupted.set()
+
+    def is_speaking(self):
+        """True while a sentence is being spoken or waiting to be."""
+        return self._queue.unfinished_tasks > 0
+
+    def wait_until_idle(self):
+        self._queue.join()
+
+    def stop(self):
+        self.interrupt()
+        self._queue.put((None, _STOP))
+
+    def run(self):
+        if self.engine_factory is None:
+            import pyttsx3
+            self.engine_factory = pyttsx3.init
+        self.engine = self.engine_factory()
+        self.engine.connect('started-word', self._on_word)
+        while True:
+            generation, sentence = self._queue.get()
+            try:
+                if sentence is _STOP:
+                    return
+                if generation != self._generation:
+                    continue
+                self._interrupted.clear()
+                with span('tts.speak', characters=len(sentence)):
+                    self._speak(sentence)
+            except Exception as e:
+                logger.error(f"Error in text-to-speech: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _on_word(self, name, location, length):
+        # pyttsx3 can only be stopped from inside its own loop, so poll the flag here
+        if self._interrupted.is_set():
+            self.engine.stop()
+
+    def _speak(self, sentence):
+        path = self._cached_audio(sentence)
+        if path is not None:
+            self.player(path, self._interrupted)
+            return
+        self.engine.say(sentence)
+        self.engine.runAndWait()
+
+    def _cached_audio(self, sentence):
+        if self.player is None or not self.cache_dir:
+            return None
+        path = os.path.join(self.cache_dir, hashlib.sha1(sentence.encode('utf-8')).hexdigest() + '.wav')
+        if os.path.exists(path):
+            return path
+        self._counts[sentence] += 1
+        if self._counts[sentence] < self.cache_after:
+            return None
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.engine.save_to_file(sentence, path)
+        self.engine.runAndWait()
+        del self._counts[sentence]
+        return path if os.path.exists(path) else None
+
+
+_default_worker = None
+_default_worker_lock = threading.Lock()
+
+
+def get_tts_worker():
+    """Return the process-wide, started ``TTSWorker``.
+
+    pyttsx3 keeps one engine per driver, so every module that speaks must
+    share one worker rather than start its own thread on the same engine.
+    """
+    global _default_worker
+    with _default_worker_lock:
+        if _default_worker is None:
+            _default_worker = TTSWorker()
+            _default_worker.start()
+        return _default_worker
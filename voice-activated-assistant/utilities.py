@@ -1,8 +1,20 @@
 import logging
 from logging.handlers import RotatingFileHandler
 import os
+import queue
+import threading
+import time
 from cryptography.fernet import Fernet
 
+# Separates records that were encrypted together in one token.
+RECORD_SEPARATOR = '\x1e'
+
+def fernet_line_size(plaintext_size):
+    """Bytes of the log line holding a Fernet token of ``plaintext_size`` bytes, newline included."""
+    # version, timestamp, IV and HMAC around the PKCS7-padded ciphertext, then base64
+    raw = 1 + 8 + 16 + (plaintext_size // 16 + 1) * 16 + 32
+    return (raw + 2) // 3 * 4 + 1
+
 class EncryptedFileHandler(RotatingFileHandler):
     def __init__(self, filename, mode='a', maxBytes=0, backupCount=0, encoding=None, delay=False, encryption_key=None):
         super().__init__(filename, mode, maxBytes, backupCount, encoding, delay)
@@ -16,22 +28,182 @@ class EncryptedFileHandler(RotatingFileHandler):
         try:
             msg = self.format(record)
             encrypted_msg = self.encryptor.encrypt(msg.encode()) + b'\n'
+            # The raw os.write bypasses RotatingFileHandler.emit, so check the size limit here
+            if self.maxBytes > 0 and os.fstat(self.stream.fileno()).st_size + len(encrypted_msg) > self.maxBytes:
+                self.doRollover()
+                if self.stream is None:
+                    self.stream = self._open()
             os.write(self.stream.fileno(), encrypted_msg)
         except Exception as e:
             self.handleError(record)
 
+class AsyncEncryptedFileHandler(logging.Handler):
+    """Encrypted, size-rotated log file written by a background thread.
+
+    ``emit`` only puts the record on a queue. The writer thread takes up to
+    ``batch_size`` queued records at a time, formats them, and encrypts them
+    as Fernet tokens (records separated by ``RECORD_SEPARATOR``), as few as
+    fit: with ``maxBytes`` set, a token holds only as many records as keep its
+    line within ``maxBytes``. Each token is one line, written through a
+    buffered file. Files rotate like ``RotatingFileHandler``: ``maxBytes`` per
+    file, ``backupCount`` backups, and with no backups the file just grows.
+    The limit is exceeded only by a single record too large for it.
+    ``iter_encrypted_log`` reads both this format and ``EncryptedFileHandler``'s.
+    """
+
+    def __init__(self, filename, maxBytes=0, backupCount=0, encryption_key=None, batch_size=256, flush_interval=0.2):
+        super().__init__()
+        if encryption_key is None:
+            raise ValueError("Encryption key must be provided for encrypted logging.")
+        self.baseFilename = os.path.abspath(filename)
+        self.maxBytes = maxBytes
+        self.backupCount = backupCount
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.encryptor = Fernet(encryption_key)
+        self.queue = queue.SimpleQueue()
+        self._file = None
+        self._closed = False
+        self._writer = threading.Thread(target=self._run, name='encrypted-log-writer', daemon=True)
+        self._writer.start()
+
+    def emit(self, record):
+        try:
+            # Resolve the message now: its arguments may change before the writer formats it
+            record.msg = record.getMessage()
+            record.args = None
+            if record.exc_info:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+                record.exc_info = None
+            self.queue.put(record)
+        except Exception:
+            self.handleError(record)
+
+    def _run(self):
+        while True:
+            record = self.queue.get()
+            if record is None:
+                break
+            batch = [record]
+            deadline = time.monotonic() + self.flush_interval
+            stop = False
+            while len(batch) < self.batch_size:
+                try:
+                    record = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if record is None:
+                    stop = True
+                    break
+                batch.append(record)
+            self._write_batch(batch)
+            if stop:
+                break
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _payloads(self, messages):
+        """Join ``messages`` into as few payloads as keep each token's line within ``maxBytes``."""
+        if self.maxBytes <= 0:
+            yield RECORD_SEPARATOR.join(messages).encode('utf-8')
+            return
+        separator = RECORD_SEPARATOR.encode('utf-8')
+        chunk, size = [], 0
+        for message in messages:
+            encoded = message.encode('utf-8')
+            added = len(encoded) + (len(separator) if chunk else 0)
+            if chunk and fernet_line_size(size + added) > self.maxBytes:
+                yield separator.join(chunk)
+                chunk, size, added = [], 0, len(encoded)
+            chunk.append(encoded)
+            size += added
+        if chunk:
+            yield separator.join(chunk)
+
+    def _write_batch(self, batch):
+        try:
+            if self._file is None:
+                self._file = open(self.baseFilename, 'ab', buffering=64 * 1024)
+            for payload in self._payloads([self.format(record) for record in batch]):
+                token = self.encryptor.encrypt(payload) + b'\n'
+                if self._should_rollover(len(token)):
+                    self._rollover()
+                self._file.write(token)
+            self._file.flush()
+        except Exception:
+            for record in batch:
+                self.handleError(record)
+
+    def _should_rollover(self, size):
+        # Like RotatingFileHandler, nothing rotates without backups to rotate into
+        return (self.maxBytes > 0 and self.backupCount > 0 and self._file.tell() > 0
+                and self._file.tell() + size > self.maxBytes)
+
+    def _rollover(self):
+        self._file.close()
+        for i in range(self.backupCount - 1, 0, -1):
+            source = f"{self.baseFilename}.{i}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.baseFilename}.{i + 1}")
+        os.replace(self.baseFilename, f"{self.baseFilename}.1")
+        self._file = open(self.baseFilename, 'wb', buffering=64 * 1024)
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self.queue.put(None)
+            self._writer.join()
+        super().close()
+
+def iter_encrypted_log(path, encryption_key, include_backups=False):
+    """Yield the decrypted records of an encrypted log file, oldest first.
+
+    With ``include_backups`` the rotated ``path.N`` files are read first.
+    """
+    decryptor = Fernet(encryption_key)
+    paths = [path]
+    if include_backups:
+        backups = []
+        index = 1
+        while os.path.exists(f"{path}.{index}"):
+            backups.append(f"{path}.{index}")
+            index += 1
+        paths = backups[::-1] + paths
+    for log_path in paths:
+        with open(log_path, 'rb') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield from decryptor.decrypt(line).decode('utf-8').split(RECORD_SEPARATOR)
+
+def percentile(values, q):
+    """Linear-interpolated ``q``-th percentile (0-100) of ``values``, or None if empty."""
+    values = sorted(values)
+    if not values:
+        return None
+    position = (len(values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
 class CustomLogger:
-    def __init__(self, log_file, max_bytes=1000000, backup_count=5, encryption_key=None):
+    def __init__(self, log_file, max_bytes=1000000, backup_count=5, encryption_key=None, async_writes=False):
         self.log_file = log_file
         self.max_bytes = max_bytes
         self.backup_count = backup_count
         self.encryption_key = encryption_key
+        self.async_writes = async_writes
         self.setup_logging()
 
     def setup_logging(self):
-        os.makedirs(os.path.dirname(self.log_file), exist_ok=True)
-        os.chmod(os.path.dirname(self.log_file), 0o700)
-        if self.encryption_key:
+        log_dir = os.path.dirname(self.log_file)
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
+            os.chmod(log_dir, 0o700)
+        if self.encryption_key and self.async_writes:
+            handler = AsyncEncryptedFileHandler(self.log_file, maxBytes=self.max_bytes, backupCount=self.backup_count, encryption_key=self.encryption_key)
+        elif self.encryption_key:
             handler = EncryptedFileHandler(self.log_file, maxBytes=self.max_bytes, backupCount=self.backup_count, encryption_key=self.encryption_key)
         else:
             handler = RotatingFileHandler(self.log_file, maxBytes=self.max_bytes, backupCount=self.backup_count)
@@ -40,6 +212,7 @@ class CustomLogger:
         self.logger = logging.getLogger(__name__)
         self.logger.setLevel(logging.INFO)
         self.logger.addHandler(handler)
+        self.handler = handler
 
     def log_interaction(self, text, response):
         self.logger.info(f'Processed interaction: Text: "{text}" -> Response: "{response}"')
@@ -50,6 +223,11 @@ class CustomLogger:
     def log_info(self, message):
         self.logger.info(message)
 
+    def close(self):
+        """Flush pending records and release the log file."""
+        self.logger.removeHandler(self.handler)
+        self.handler.close()
+
 if __name__ == "__main__":
     # In practice, retrieve an existing encryption key securely
     key = Fernet.generate_key()
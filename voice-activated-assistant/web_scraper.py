@@ -0,0 +1,190 @@
+import hashlib
+import json
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+
+class ParagraphExtractor(HTMLParser):
+    """Incremental parser that keeps only the text inside ``<p>`` elements.
+
+    Fed chunk by chunk as the response streams in, it never builds a document
+    tree; script and style content is ignored.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.paragraphs = []
+        self._depth = 0
+        self._skip = 0
+        self._current = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'p':
+            self._depth += 1
+        elif tag in ('script', 'style'):
+            self._skip += 1
+
+    def handle_endtag(self, tag):
+        if tag == 'p' and self._depth:
+            self._depth -= 1
+            if not self._depth:
+                text = ' '.join(''.join(self._current).split())
+                if text:
+                    self.paragraphs.append(text)
+                self._current = []
+        elif tag in ('script', 'style') and self._skip:
+            self._skip -= 1
+
+    def handle_data(self, data):
+        if self._depth and not self._skip:
+            self._current.append(data)
+
+
+class WebScraper:
+    """Fetches paragraph text from web pages over a pooled session, with a conditional-GET disk cache.
+
+    Pages are fetched concurrently by up to ``max_workers`` threads sharing one
+    ``requests.Session`` whose connection pool holds ``pool_size`` connections
+    per host. Each cached page keeps its ``ETag``/``Last-Modified`` validators,
+    so a refetch that the server answers with 304 reuses the cached text.
+    Bodies are streamed into ``ParagraphExtractor`` and cut off after
+    ``max_chars`` characters, spaCy's default ``nlp.max_length``.
+    """
+
+    def __init__(self, cache_dir='web_cache', max_workers=8, pool_size=16, timeout=(3.05, 15),
+                 max_chars=1000000, retries=2, session=None):
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.max_chars = max_chars
+        self.session = session or self._create_session(pool_size, retries)
+
+    @staticmethod
+    def _create_session(pool_size, retries):
+        session = requests.Session()
+        retry = Retry(total=retries, backoff_factor=0.3, status_forcelist=(502, 503, 504), allowed_methods=('GET',))
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers['User-Agent'] = 'VoiceChatassist/1.0'
+        return session
+
+    def _cache_path(self, url):
+        return os.path.join(self.cache_dir, hashlib.sha1(url.encode('utf-8')).hexdigest() + '.json')
+
+    def _load_cached(self, url):
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._cache_path(url), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _store_cached(self, url, response, text):
+        if not self.cache_dir:
+            return
+        entry = {'url': url, 'etag': response.headers.get('ETag'),
+                 'last_modified': response.headers.get('Last-Modified'), 'text': text}
+        if not entry['etag'] and not entry['last_modified']:
+            return  # nothing to revalidate with
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temporary = self._cache_path(url) + '.tmp'
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump(entry, f)
+        os.replace(temporary, self._cache_path(url))
+
+    def fetch(self, url):
+        """Return the paragraph text of ``url``, revalidating a cached copy when there is one."""
+        cached = self._load_cached(url)
+        headers = {}
+        if cached:
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+        with self.session.get(url, headers=headers, timeout=self.timeout, stream=True) as response:
+            if response.status_code == 304 and cached:
+                return cached['text']
+            response.raise_for_status()
+            if response.encoding is None:
+                response.encoding = response.apparent_encoding or 'utf-8'
+            extractor = ParagraphExtractor()
+            received = 0
+            for chunk in response.iter_content(chunk_size=64 * 1024, decode_unicode=True):
+                extractor.feed(chunk)
+                received += len(chunk)
+                if received >= self.max_chars:
+                    logger.warning(f"Truncated {url} after {received} characters")
+                    break
+            extractor.close()
+            text = ' '.join(extractor.paragraphs)
+            self._store_cached(url, response, text)
+            return text
+
+    def scrape_many(self, urls):
+        """Fetch ``urls`` concurrently; returns ``{url: text}``, with ``None`` for pages that failed."""
+        def fetch_or_none(url):
+            try:
+                return self.fetch(url)
+            except requests.RequestException as e:
+                logger.error(f"Web scraping error for {url}: {e}")
+                return None
+
+        urls = list(urls)
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(urls) or 1)) as executor:
+            return dict(zip(urls, executor.map(fetch_or_none, urls)))
+
+    def close(self):
+        self.session.close()
+
+
+def chunk_text(text, count_tokens, window_tokens=900):
+    """Split ``text`` at sentence boundaries into windows of at most ``window_tokens`` tokens.
+
+    ``count_tokens`` maps a list of strings to their token counts. A single
+    sentence longer than the window becomes its own window and is left to the
+    summarizer's truncation.
+    """
+    sentences = [sentence for sentence in _SENTENCE_END.split(text) if sentence.strip()]
+    if not sentences:
+        return []
+    windows, current, current_tokens = [], [], 0
+    for sentence, tokens in zip(sentences, count_tokens(sentences)):
+        if current and current_tokens + tokens > window_tokens:
+            windows.append(' '.join(current))
+            current, current_tokens = [], 0
+        current.append(sentence)
+        current_tokens += tokens
+    windows.append(' '.join(current))
+    return windows
+
+
+def summarize_long_texts(texts, ml_model, window_tokens=900, max_rounds=3):
+    """Summarize texts of any length by summarizing model-sized windows in one batch and merging.
+
+    The windows of every text longer than one window go through
+    ``ml_model.summarize_batch`` together; the joined window summaries are
+    windowed again until each text fits in one window (at most ``max_rounds``
+    rounds), and the results are routed through ``ml_model.router``.
+    """
+    texts = list(texts)
+    for _ in range(max_rounds):
+        windows = [chunk_text(text, ml_model.count_tokens, window_tokens) for text in texts]
+        pending = [i for i, text_windows in enumerate(windows) if len(text_windows) > 1]
+        if not pending:
+            break
+        summaries = iter(ml_model.summarize_batch([window for i in pending for window in windows[i]]))
+        for i in pending:
+            texts[i] = ' '.join(next(summaries) for _ in windows[i])
+    return ml_model.router.summarize_many(texts)